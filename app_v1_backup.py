@@ -9,10 +9,12 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import io
-import json
-from mql5_optimization_analyzer import MQL5OptimizationAnalyzer
-import plotly.express as px
-import plotly.graph_objects as go
+import hashlib
+from typing import List
+from lxml import etree
+# Constantes et lecteurs partagés avec l'analyseur (module léger : polars, numba
+# et numexpr n'y sont importés qu'à l'usage)
+from mql5_optimization_analyzer import SS_NS, SS_TAG, _downcast_numeric, _read_excel, dumps_json
 
 # Configuration de la page
 st.set_page_config(
@@ -48,65 +50,127 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def parse_mt5_xml(file_path):
-    """Parse un fichier XML MetaTrader 5 et le convertit en DataFrame"""
-    import xml.etree.ElementTree as ET
+# Textes des cellules d'une ligne, via une XPath compilée une seule fois
+_CELL_VALUES = etree.XPath(
+    './ss:Cell/ss:Data/text()',
+    namespaces={'ss': SS_NS},
+    smart_strings=False
+)
 
-    # Lire le fichier avec différents encodages
-    content = None
-    for encoding in ['utf-8', 'utf-16', 'cp1252', 'iso-8859-1', 'windows-1252']:
-        try:
-            with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-                content = f.read()
+def _detect_xml_encoding(head):
+    """Encodage à imposer à lxml, ou None si le BOM / la déclaration XML suffisent"""
+    if head[:2] in (b'\xff\xfe', b'\xfe\xff') or head[:3] == b'\xef\xbb\xbf':
+        return None
+    if head.lstrip().startswith(b'<?xml'):
+        return None
+
+    # Ni BOM ni déclaration : détection sur l'en-tête uniquement
+    try:
+        import chardet
+    except ImportError:
+        return None
+    return chardet.detect(head)['encoding']
+
+def _count_rows(raw):
+    """Nombre de balises Row de l'export brut (UTF-8 ou UTF-16), sans parser le XML"""
+    if raw[:2] == b'\xff\xfe':
+        codec = 'utf-16-le'
+    elif raw[:2] == b'\xfe\xff':
+        codec = 'utf-16-be'
+    else:
+        codec = 'utf-8'
+    return raw.count('<Row'.encode(codec)) + raw.count('<ss:Row'.encode(codec))
+
+def _sparse_row_values(row):
+    """Valeurs d'une ligne creuse : respecte ss:Index et les cellules sans donnée"""
+    values = []
+    for cell in row.iterchildren(f'{SS_TAG}Cell'):
+        index = cell.get(f'{SS_TAG}Index')
+        if index is not None:
+            values.extend([None] * (int(index) - 1 - len(values)))
+        data_elem = cell.find(f'{SS_TAG}Data')
+        values.append(data_elem.text if data_elem is not None else None)
+    return values
+
+def _parse_mt5_rows(source, columns=None):
+    """Lit les lignes d'un XML MetaTrader 5 dans un DataFrame de texte brut"""
+    raw = source if isinstance(source, (bytes, bytearray)) else None
+    if raw is not None:
+        source = io.BytesIO(raw)
+
+    # Encodage déterminé une seule fois sur les 64 premiers Ko
+    head = source.read(65536)
+    source.seek(0)
+
+    # Nombre de lignes compté sur les octets bruts (en-tête exclu), pour préallouer les colonnes
+    capacity = max(_count_rows(raw) - 1, 0) if raw is not None else 0
+
+    # Lecture en flux des lignes de la première feuille uniquement
+    context = etree.iterparse(source, events=('end',), tag=(f'{SS_TAG}Row', f'{SS_TAG}Worksheet'),
+                              encoding=_detect_xml_encoding(head),
+                              huge_tree=True, recover=True)
+
+    headers = None
+    keep_idx = []
+    data_cols = []
+    n_rows = 0
+
+    for _, row in context:
+        if row.tag == f'{SS_TAG}Worksheet':
             break
-        except:
-            continue
-
-    if content is None:
-        # Si tous les encodages échouent, lire en mode binaire et nettoyer
-        with open(file_path, 'rb') as f:
-            raw_content = f.read()
-        content = raw_content.decode('utf-8', errors='ignore')
-
-    # Parser le XML depuis le contenu nettoyé
-    root = ET.fromstring(content)
-
-    # Trouver la worksheet
-    ns = {'ss': 'urn:schemas-microsoft-com:office:spreadsheet'}
-    worksheet = root.find('.//ss:Worksheet', ns)
-    table = worksheet.find('.//ss:Table', ns)
-    rows = table.findall('.//ss:Row', ns)
-
-    data = []
-    headers = []
-
-    for i, row in enumerate(rows):
-        cells = row.findall('.//ss:Cell', ns)
-        row_data = []
-
-        for cell in cells:
-            data_elem = cell.find('.//ss:Data', ns)
-            if data_elem is not None:
-                value = data_elem.text
-                # Convertir en numérique si possible
-                try:
-                    if '.' in str(value):
-                        value = float(value)
-                    else:
-                        value = int(value)
-                except:
-                    pass
-                row_data.append(value)
+        if headers is None:
+            headers = _sparse_row_values(row)
+            keep_idx = [i for i, h in enumerate(headers) if columns is None or h in columns]
+            data_cols = [np.empty(capacity, dtype=object) for _ in keep_idx]
+        else:
+            # Ligne complète : une seule XPath ; sinon alignement via ss:Index
+            row_data = _CELL_VALUES(row)
+            if len(row_data) != len(headers):
+                row_data = _sparse_row_values(row)
+
+            if n_rows == capacity:
+                # Estimation dépassée : on double la capacité
+                extra = max(capacity, 1024)
+                data_cols = [np.concatenate((col, np.empty(extra, dtype=object))) for col in data_cols]
+                capacity += extra
+
+            # Écriture par position dans chaque colonne (cellules manquantes = None)
+            if columns is None:
+                for col, value in zip(data_cols, row_data):
+                    col[n_rows] = value
             else:
-                row_data.append(None)
+                n_cells = len(row_data)
+                for col, i in zip(data_cols, keep_idx):
+                    if i < n_cells:
+                        col[n_rows] = row_data[i]
+            n_rows += 1
+
+        # Libérer la ligne traitée pour garder une empreinte mémoire constante
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+    del context
+
+    # Créer le DataFrame colonne par colonne (texte brut)
+    df = pd.DataFrame({i: col[:n_rows] for i, col in enumerate(data_cols)}, copy=False)
+    df.columns = [headers[i] for i in keep_idx]
+    return df
 
-        if i == 0:
-            headers = row_data
-        else:
-            data.append(row_data)
+def parse_mt5_xml(source, columns=None):
+    """Parse un XML MetaTrader 5 (bytes ou fichier ouvert) et le convertit en DataFrame
+
+    columns : noms des colonnes à conserver (None = toutes) ; les autres cellules
+    ne sont ni stockées ni converties.
+    """
+    df = _parse_mt5_rows(source, columns)
 
-    # Créer le DataFrame
-    df = pd.DataFrame(data, columns=headers)
+    # Conversion numérique vectorisée
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        except (ValueError, TypeError):
+            pass
     return df
 
 def main():
@@ -171,9 +235,14 @@ def main():
             with col3:
                 st.info(f"🔧 **Type:** {file_details['Type']}")
 
-            # Bouton d'analyse
+            # Bouton d'analyse ; aux reruns suivants (top N, choix de variable),
+            # l'analyseur gardé en session est réaffiché sans relancer le pipeline
             if st.button("🚀 ANALYSER LES OPTIMISATIONS", type="primary"):
                 analyze_optimizations(uploaded_file, profit_min, dd_max, top_n)
+            elif st.session_state.get('analyzer_key') == _analysis_key(uploaded_file, profit_min, dd_max):
+                analyzer = st.session_state['analyzer']
+                analyzer.find_best_optimizations(top_n=top_n)
+                display_results(analyzer, profit_min, dd_max)
 
         except Exception as e:
             st.error(f"[ERREUR] Erreur lors du chargement du fichier: {str(e)}")
@@ -203,8 +272,69 @@ def main():
             - ✅ Générer des graphiques interactifs
             """)
 
+def _read_csv(file_bytes):
+    """Lit un CSV avec le lecteur multi-thread de pyarrow, sinon avec pandas"""
+    try:
+        import pyarrow.csv as pacsv
+        table = pacsv.read_csv(
+            io.BytesIO(file_bytes),
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 20)
+        )
+        return table.to_pandas()
+    except Exception:
+        # pyarrow absent ou CSV que pyarrow refuse : lecteur pandas standard
+        return pd.read_csv(io.BytesIO(file_bytes))
+
+@st.cache_data(max_entries=4)
+def _load_df(file_bytes: bytes, name: str) -> pd.DataFrame:
+    """Lit le fichier uploadé (CSV, XML MT5 ou Excel), mis en cache sur son contenu"""
+    if name.endswith('.csv'):
+        df = _read_csv(file_bytes)
+    elif not name.endswith('.xml'):
+        df = _read_excel(io.BytesIO(file_bytes), arrow=False)
+    elif file_bytes[:2] == b'PK':
+        # Un .xlsx renommé en .xml reste une archive zip, reconnaissable à sa signature
+        df = _read_excel(io.BytesIO(file_bytes), arrow=False)
+    else:
+        # Export XML MetaTrader 5 (SpreadsheetML 2003), qu'openpyxl ne sait pas lire
+        df = parse_mt5_xml(file_bytes)
+
+    # Lecture de l'app : toutes les colonnes numériques sont réduites, pas seulement les paramètres
+    return _downcast_numeric(df, df.columns)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _run_analysis(file_bytes: bytes, name: str, profit_min, dd_max) -> dict:
+    """Filtre et analyse les optimisations ; renvoie un dict sérialisable pour le cache"""
+    from mql5_optimization_analyzer import (MQL5OptimizationAnalyzer, MQL5OptimizationAnalyzerPolars,
+                                            POLARS_AVAILABLE)
+
+    # Filtrage et groupby sous polars quand il est installé, pandas sinon
+    analyzer = MQL5OptimizationAnalyzerPolars() if POLARS_AVAILABLE else MQL5OptimizationAnalyzer()
+    analyzer.data = _load_df(file_bytes, name)
+    analyzer.filter_profitable_optimizations(min_profit=profit_min, max_drawdown=dd_max)
+    analyzer.analyze_variables()
+
+    return {
+        'profit_col': analyzer._profit_col,
+        'filtered_data': analyzer.filtered_data,
+        'variable_stats': analyzer.variable_stats
+    }
+
+def _analysis_key(uploaded_file, profit_min, dd_max) -> str:
+    """Identifie une analyse : contenu du fichier + seuils de filtrage (top N exclu)"""
+    return hashlib.md5(uploaded_file.getvalue()).hexdigest() + f'|{profit_min}|{dd_max}'
+
 def analyze_optimizations(uploaded_file, profit_min, dd_max, top_n):
     """Analyse les optimisations uploadées"""
+    from mql5_optimization_analyzer import MQL5OptimizationAnalyzer
+
+    key = _analysis_key(uploaded_file, profit_min, dd_max)
+    if st.session_state.get('analyzer_key') == key:
+        # Même fichier, mêmes seuils : seul le top N est recalculé
+        analyzer = st.session_state['analyzer']
+        analyzer.find_best_optimizations(top_n=top_n)
+        display_results(analyzer, profit_min, dd_max)
+        return
 
     progress_bar = st.progress(0)
     status_text = st.empty()
@@ -214,79 +344,34 @@ def analyze_optimizations(uploaded_file, profit_min, dd_max, top_n):
         status_text.text("📂 Chargement du fichier...")
         progress_bar.progress(20)
 
-        # Lecture du fichier
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith('.xml'):
-            # Traitement spécial pour les fichiers XML MetaTrader 5
+        file_bytes = uploaded_file.getvalue()
+        if uploaded_file.name.endswith('.xml'):
             st.info("🔧 Traitement du fichier XML MetaTrader 5...")
 
-            # Sauvegarder temporairement le fichier uploadé
-            with open("temp_file.xml", "wb") as f:
-                f.write(uploaded_file.getvalue())
-
-            # Essayer différentes méthodes de lecture
-            df = None
-            methods_tried = []
-
-            # Méthode 1: pandas avec openpyxl
-            try:
-                df = pd.read_excel("temp_file.xml", engine='openpyxl')
-                methods_tried.append("✅ openpyxl")
-            except Exception as e1:
-                methods_tried.append(f"❌ openpyxl: {str(e1)[:50]}...")
-
-            # Méthode 2: pandas standard
-            if df is None:
-                try:
-                    df = pd.read_excel("temp_file.xml")
-                    methods_tried.append("✅ pandas standard")
-                except Exception as e2:
-                    methods_tried.append(f"❌ pandas standard: {str(e2)[:50]}...")
-
-            # Méthode 3: parser XML manuel
-            if df is None:
-                try:
-                    df = parse_mt5_xml("temp_file.xml")
-                    methods_tried.append("✅ parser XML manuel")
-                except Exception as e3:
-                    methods_tried.append(f"❌ parser manuel: {str(e3)[:50]}...")
-
-            # Afficher les méthodes essayées
-            with st.expander("🔍 Méthodes de lecture testées"):
-                for method in methods_tried:
-                    st.write(method)
-
-            # Nettoyer le fichier temporaire
-            import os
-            if os.path.exists("temp_file.xml"):
-                os.remove("temp_file.xml")
-
-            if df is None:
-                st.error("❌ Impossible de lire le fichier XML. Essayez de l'exporter en format Excel (.xlsx) depuis MetaTrader 5.")
-                return
-        else:
-            df = pd.read_excel(uploaded_file)
+        try:
+            df = _load_df(file_bytes, uploaded_file.name)
+        except Exception as e:
+            st.error(f"❌ Impossible de lire le fichier: {e}. Essayez de l'exporter en format Excel (.xlsx) depuis MetaTrader 5.")
+            return
 
         progress_bar.progress(40)
 
-        # Étape 2: Analyse
+        # Étape 2: Filtrage et analyse des variables (mis en cache)
         status_text.text("🔍 Analyse des données...")
-
-        analyzer = MQL5OptimizationAnalyzer()
-        analyzer.data = df
-
-        progress_bar.progress(60)
-
-        # Filtrage
-        analyzer.filter_profitable_optimizations(min_profit=profit_min, max_drawdown=dd_max)
+        results = _run_analysis(file_bytes, uploaded_file.name, profit_min, dd_max)
 
         progress_bar.progress(80)
 
-        # Analyse des variables
-        analyzer.analyze_variables()
+        analyzer = MQL5OptimizationAnalyzer()
+        analyzer.data = df
+        analyzer.profit_col = results['profit_col']
+        analyzer.filtered_data = results['filtered_data']
+        analyzer.variable_stats = results['variable_stats']
         analyzer.find_best_optimizations(top_n=top_n)
 
+        st.session_state['analyzer'] = analyzer
+        st.session_state['analyzer_key'] = key
+
         progress_bar.progress(100)
         status_text.text("✅ Analyse terminée!")
 
@@ -297,15 +382,31 @@ def analyze_optimizations(uploaded_file, profit_min, dd_max, top_n):
         st.error(f"❌ Erreur durant l'analyse: {str(e)}")
         st.exception(e)
 
+def _top_values(df: pd.DataFrame, var: str, profit_col: str, n: int = 5) -> List[dict]:
+    """Top n valeurs d'une variable par profit moyen, en un seul groupby vectorisé
+
+    Renvoie le format attendu de variable_stats[var]['top_valeurs'] :
+    une liste de dicts {valeur, profit_moyen, occurrences}.
+    """
+    top = (df.groupby(var)[profit_col]
+             .agg(['mean', 'size'])
+             .nlargest(n, 'mean')
+             .reset_index())
+    top.columns = ['valeur', 'profit_moyen', 'occurrences']
+    return top.to_dict('records')
+
 def display_results(analyzer, profit_min, dd_max):
     """Affiche les résultats de l'analyse"""
+    import plotly.graph_objects as go
 
     st.markdown("---")
     st.header("📊 Résultats de l'Analyse")
 
-    # Résumé général
+    # Résumé général (compteurs calculés une seule fois)
+    fdf = analyzer.filtered_data
+    pcol = analyzer.profit_col
     total_opts = len(analyzer.data) if analyzer.data is not None else 0
-    profitable_opts = len(analyzer.filtered_data) if analyzer.filtered_data is not None else 0
+    profitable_opts = 0 if fdf is None else len(fdf)
     success_rate = (profitable_opts / total_opts * 100) if total_opts > 0 else 0
 
     # Métriques principales
@@ -321,9 +422,8 @@ def display_results(analyzer, profit_min, dd_max):
         st.metric("🎯 Taux de Succès", f"{success_rate:.1f}%")
 
     with col4:
-        profit_cols = [col for col in analyzer.data.columns if 'profit' in col.lower() or 'gain' in col.lower()]
-        if profit_cols and analyzer.filtered_data is not None and len(analyzer.filtered_data) > 0:
-            max_profit = analyzer.filtered_data[profit_cols[0]].max()
+        if pcol and profitable_opts > 0:
+            max_profit = fdf[pcol].max()
             st.metric("💰 Meilleur Profit", f"{max_profit:,.2f}€")
 
     if profitable_opts == 0:
@@ -333,19 +433,20 @@ def display_results(analyzer, profit_min, dd_max):
     # Graphiques
     st.subheader("📊 Visualisations")
 
-    # Graphique de distribution des profits
-    if analyzer.filtered_data is not None:
-        profit_cols = [col for col in analyzer.filtered_data.columns if 'profit' in col.lower() or 'gain' in col.lower()]
-        if profit_cols:
-            fig_hist = px.histogram(
-                analyzer.filtered_data,
-                x=profit_cols[0],
-                title="Distribution des Profits",
-                nbins=20,
-                color_discrete_sequence=['#1f77b4']
-            )
-            fig_hist.update_layout(xaxis_title="Profit (€)", yaxis_title="Nombre d'optimisations")
-            st.plotly_chart(fig_hist, use_container_width=True)
+    # Graphique de distribution des profits (classes calculées côté serveur)
+    if pcol:
+        profits = fdf[pcol].to_numpy(dtype=np.float64)
+        counts, edges = np.histogram(profits, bins=20)
+        centers = 0.5 * (edges[:-1] + edges[1:])
+
+        fig_hist = go.Figure(go.Bar(x=centers, y=counts, marker_color='#1f77b4'))
+        fig_hist.update_layout(
+            title="Distribution des Profits",
+            xaxis_title="Profit (€)",
+            yaxis_title="Nombre d'optimisations",
+            bargap=0.02
+        )
+        st.plotly_chart(fig_hist, use_container_width=True)
 
     # Analyse par variables
     if analyzer.variable_stats:
@@ -371,10 +472,14 @@ def display_results(analyzer, profit_min, dd_max):
                 """)
 
             with col2:
-                # Top 5 des valeurs
-                if var_stats['top_valeurs']:
+                # Top 5 des valeurs : liste de dicts {valeur, profit_moyen, occurrences}
+                top_valeurs: List[dict] = var_stats['top_valeurs']
+                if not isinstance(top_valeurs, list):
+                    top_valeurs = _top_values(fdf, selected_var, pcol)
+
+                if top_valeurs:
                     st.markdown("**🏆 Top 5 des meilleures valeurs:**")
-                    for i, top_val in enumerate(var_stats['top_valeurs'][:5], 1):
+                    for i, top_val in enumerate(top_valeurs[:5], 1):
                         st.write(f"{i}. **{top_val['valeur']}** → {top_val['profit_moyen']:.2f}€ (×{top_val['occurrences']})")
 
     # Meilleures optimisations
@@ -384,25 +489,29 @@ def display_results(analyzer, profit_min, dd_max):
         # Tableau des meilleures optimisations
         best_df = pd.DataFrame(analyzer.best_optimizations)
 
-        # Formatage pour l'affichage
+        # Formatage du profit côté navigateur : la colonne reste numérique (tri, export CSV)
+        column_config = {}
         if 'profit' in best_df.columns:
-            best_df['profit'] = best_df['profit'].apply(lambda x: f"{x:,.2f}€")
+            column_config['profit'] = st.column_config.NumberColumn(format="%.2f€")
 
         st.dataframe(
             best_df,
             use_container_width=True,
-            height=400
+            height=400,
+            column_config=column_config
         )
 
         # Boutons de téléchargement
         col1, col2 = st.columns(2)
 
         with col1:
-            # Téléchargement CSV
-            csv = best_df.to_csv(index=False)
+            # Téléchargement CSV, écrit par blocs directement dans un buffer binaire
+            csv_buffer = io.BytesIO()
+            best_df.to_csv(csv_buffer, index=False, encoding='utf-8', chunksize=10_000)
+            csv_buffer.seek(0)
             st.download_button(
                 label="📥 Télécharger CSV",
-                data=csv,
+                data=csv_buffer,
                 file_name="meilleures_optimisations.csv",
                 mime="text/csv"
             )
@@ -418,10 +527,9 @@ def display_results(analyzer, profit_min, dd_max):
                     'success_rate': success_rate
                 }
             }
-            json_str = json.dumps(json_data, ensure_ascii=False, indent=2, default=str)
             st.download_button(
                 label="📥 Télécharger JSON",
-                data=json_str,
+                data=dumps_json(json_data),
                 file_name="analyse_complete.json",
                 mime="application/json"
             )
@@ -10,11 +10,11 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import io
-import json
-from mql5_optimization_analyzer import MQL5OptimizationAnalyzer
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import hashlib
+from functools import lru_cache
+from types import MappingProxyType
+from lxml import etree
+from mql5_optimization_analyzer import MQL5OptimizationAnalyzer, SS_TAG, _read_excel, dumps_json
 
 # Configuration de la page
 st.set_page_config(
@@ -78,65 +78,103 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def parse_mt5_xml(file_path):
-    """Parse un fichier XML MetaTrader 5 et le convertit en DataFrame"""
-    import xml.etree.ElementTree as ET
+@lru_cache(maxsize=1)
+def _plotly():
+    """Import différé de plotly (coûteux), fait au premier graphique puis mémorisé"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    return go, make_subplots
+
+# Métriques à zéro quand l'analyseur ne sait pas les calculer (lecture seule, partagée)
+_EMPTY_METRICS = MappingProxyType({
+    'total_optimizations': 0,
+    'total_profit': 0,
+    'average_profit': 0,
+    'max_profit': 0,
+    'min_profit': 0,
+    'max_drawdown': 0,
+    'win_rate': 0,
+    'profit_factor': 0,
+    'risk_reward_ratio': 0,
+    'sharpe_ratio': 0,
+    'calmar_ratio': 0,
+    'recovery_factor': 0
+})
+
+# Taille à partir de laquelle un CSV est lu par morceaux et filtré à la volée
+CHUNKED_CSV_MIN_BYTES = 64 * 1024 * 1024
+
+def _row_values(row):
+    """Valeurs d'une ligne XML : respecte ss:Index (cellules sautées) et les cellules sans donnée"""
+    values = []
+    for cell in row.iterchildren(f'{SS_TAG}Cell'):
+        index = cell.get(f'{SS_TAG}Index')
+        if index is not None:
+            values.extend([None] * (int(index) - 1 - len(values)))
+
+        # Texte brut : la conversion numérique se fait ensuite par colonne
+        if len(cell) and cell[0].tag == f'{SS_TAG}Data':
+            values.append(cell[0].text)
+        else:
+            values.append(None)
+    return values
 
-    # Lire le fichier avec différents encodages
-    content = None
-    for encoding in ['utf-8', 'utf-16', 'cp1252', 'iso-8859-1', 'windows-1252']:
-        try:
-            with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-                content = f.read()
+def _read_rows(stream, encoding=None):
+    """Lit en flux les lignes XML de la première feuille : (en-têtes, une liste de valeurs par colonne)"""
+    context = etree.iterparse(stream, events=('end',), tag=(f'{SS_TAG}Row', f'{SS_TAG}Worksheet'),
+                              encoding=encoding, huge_tree=True)
+
+    col_data = []
+    headers = None
+
+    for _, row in context:
+        if row.tag == f'{SS_TAG}Worksheet':
+            # Comme l'analyseur : les feuilles suivantes sont ignorées
             break
-        except:
-            continue
+        row_data = _row_values(row)
 
-    if content is None:
-        # Si tous les encodages échouent, lire en mode binaire et nettoyer
-        with open(file_path, 'rb') as f:
-            raw_content = f.read()
-        content = raw_content.decode('utf-8', errors='ignore')
-
-    # Parser le XML depuis le contenu nettoyé
-    root = ET.fromstring(content)
-
-    # Trouver la worksheet
-    ns = {'ss': 'urn:schemas-microsoft-com:office:spreadsheet'}
-    worksheet = root.find('.//ss:Worksheet', ns)
-    table = worksheet.find('.//ss:Table', ns)
-    rows = table.findall('.//ss:Row', ns)
-
-    data = []
-    headers = []
-
-    for i, row in enumerate(rows):
-        cells = row.findall('.//ss:Cell', ns)
-        row_data = []
-
-        for cell in cells:
-            data_elem = cell.find('.//ss:Data', ns)
-            if data_elem is not None:
-                value = data_elem.text
-                # Convertir en numérique si possible
-                try:
-                    if '.' in str(value):
-                        value = float(value)
-                    else:
-                        value = int(value)
-                except:
-                    pass
-                row_data.append(value)
-            else:
-                row_data.append(None)
-
-        if i == 0:
+        if headers is None:
             headers = row_data
+            col_data = [[] for _ in headers]
         else:
-            data.append(row_data)
+            # Lignes courtes complétées par None, cellules au-delà des en-têtes ignorées
+            n_values = len(row_data)
+            for i, values in enumerate(col_data):
+                values.append(row_data[i] if i < n_values else None)
+
+        # Libérer la ligne traitée pour garder une empreinte mémoire constante
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+    del context
+    return headers, col_data
+
+def parse_mt5_xml(source):
+    """Parse un XML MetaTrader 5 (chemin ou bytes) et le convertit en DataFrame"""
+    if isinstance(source, (bytes, bytearray)):
+        raw_content = bytes(source)
+    else:
+        with open(source, 'rb') as f:
+            raw_content = f.read()
 
-    # Créer le DataFrame
-    df = pd.DataFrame(data, columns=headers)
+    # Une seule lecture : lxml applique lui-même le BOM ou la déclaration <?xml encoding=...?>
+    try:
+        headers, col_data = _read_rows(io.BytesIO(raw_content))
+    except etree.XMLSyntaxError:
+        # Octets invalides pour l'encodage annoncé : décodage tolérant puis nouvel essai
+        codec = 'utf-16' if raw_content[:2] in (b'\xff\xfe', b'\xfe\xff') else 'utf-8'
+        content = raw_content.decode(codec, errors='replace')
+        headers, col_data = _read_rows(io.BytesIO(content.encode('utf-8')), encoding='utf-8')
+
+    # Créer le DataFrame colonne par colonne (texte brut), puis conversion numérique vectorisée
+    df = pd.DataFrame({i: values for i, values in enumerate(col_data)})
+    df.columns = headers or []
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            pass
     return df
 
 def main():
@@ -180,13 +218,6 @@ def main():
             help="Nombre d'optimisations à afficher dans le top"
         )
 
-        st.markdown("---")
-        st.markdown("### 📊 Métriques Avancées")
-        show_sharpe = st.checkbox("Sharpe Ratio", value=True)
-        show_calmar = st.checkbox("Calmar Ratio", value=True)
-        show_recovery = st.checkbox("Recovery Factor", value=True)
-        show_rr = st.checkbox("Risk/Reward Ratio", value=True)
-
     # Upload de fichier
     st.header("📁 Upload de votre fichier d'optimisation")
 
@@ -209,8 +240,7 @@ def main():
 
             # Bouton d'analyse avec style
             if st.button("🚀 ANALYSER LES OPTIMISATIONS", type="primary", use_container_width=True):
-                analyze_optimizations_v2(uploaded_file, profit_min, dd_max, top_n,
-                                       show_sharpe, show_calmar, show_recovery, show_rr)
+                analyze_optimizations_v2(uploaded_file, profit_min, dd_max, top_n)
 
         except Exception as e:
             st.error(f"[ERREUR] Erreur lors du chargement: {str(e)}")
@@ -239,8 +269,148 @@ def main():
             5. Uploadez ici pour l'analyse V2
             """)
 
-def analyze_optimizations_v2(uploaded_file, profit_min, dd_max, top_n,
-                            show_sharpe, show_calmar, show_recovery, show_rr):
+def _read_csv(file_bytes):
+    """Lit un CSV avec le moteur multi-thread pyarrow, sinon avec le moteur C de pandas"""
+    try:
+        return pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow')
+    except Exception:
+        # pyarrow absent ou CSV que pyarrow refuse
+        return pd.read_csv(io.BytesIO(file_bytes))
+
+def _read_csv_filtered(analyzer, file_bytes, profit_min, dd_max, chunksize=200_000):
+    """Lit un gros CSV par morceaux et ne garde que les lignes qui passent le filtre
+
+    Les colonnes profit/drawdown sont détectées par l'analyseur lui-même, avec les
+    règles de filter_profitable_optimizations. Renvoie les lignes retenues et le
+    nombre total de lignes lues.
+    """
+    survivors = []
+    n_total = 0
+    profit_col = dd_col = None
+
+    for chunk in pd.read_csv(io.BytesIO(file_bytes), chunksize=chunksize):
+        if n_total == 0:
+            analyzer._columns(chunk)
+            profit_col, dd_col = analyzer._profit_col, analyzer._dd_col
+        n_total += len(chunk)
+
+        if profit_col is None:
+            # Pas de colonne profit : rien à filtrer, l'analyseur le signalera
+            survivors.append(chunk)
+            continue
+
+        mask = chunk[profit_col] >= profit_min
+        if dd_col:
+            mask &= chunk[dd_col].abs() <= dd_max
+        survivors.append(chunk[mask])
+
+    # Une seule concaténation, à la fin
+    return pd.concat(survivors, ignore_index=True), n_total
+
+def _file_key(uploaded_file):
+    """Clé de cache légère du fichier uploadé, sans copier tout son contenu
+
+    file_id change à chaque nouvel upload ; à défaut, empreinte blake2b des
+    64 premiers Ko, combinée au nom et à la taille.
+    """
+    file_id = getattr(uploaded_file, 'file_id', None)
+    if file_id:
+        return (uploaded_file.name, uploaded_file.size, file_id)
+
+    pos = uploaded_file.tell()
+    uploaded_file.seek(0)
+    head = uploaded_file.read(64 * 1024)
+    uploaded_file.seek(pos)
+    return (uploaded_file.name, uploaded_file.size, hashlib.blake2b(head, digest_size=16).hexdigest())
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_df(file_key, name: str, _uploaded_file) -> pd.DataFrame:
+    """Charge le fichier uploadé en DataFrame ; mis en cache sur file_key
+
+    Le contenu n'est copié en mémoire (getvalue) qu'en cas d'absence du cache.
+    """
+    file_bytes = _uploaded_file.getvalue()
+    if name.endswith('.csv'):
+        return _read_csv(file_bytes)
+
+    # Un .xml qui commence par PK est en réalité un classeur xlsx (zip)
+    if not name.endswith('.xml') or file_bytes[:2] == b'PK':
+        return _read_excel(io.BytesIO(file_bytes), arrow=False)
+
+    # Export SpreadsheetML de MT5 : parsé directement depuis la mémoire
+    return parse_mt5_xml(file_bytes)
+
+def _downcast_for_display(df):
+    """float64 -> float32 et int64 -> int32 quand les valeurs tiennent
+
+    Appliqué une fois les calculs faits : les données filtrées ne servent plus
+    qu'aux graphiques et comptages des onglets.
+    """
+    if df is None:
+        return df
+
+    for col in df.select_dtypes(include=['float64']).columns:
+        if df[col].abs().max() < 3e38:
+            df[col] = df[col].astype(np.float32)
+
+    int32 = np.iinfo(np.int32)
+    for col in df.select_dtypes(include=['int64']).columns:
+        if df[col].min() >= int32.min and df[col].max() <= int32.max:
+            df[col] = df[col].astype(np.int32)
+    return df
+
+def _is_large_csv(size, name):
+    """CSV assez gros pour être lu par morceaux et filtré au fil de la lecture"""
+    return name.endswith('.csv') and size >= CHUNKED_CSV_MIN_BYTES
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _run_analysis(file_key, name: str, profit_min, dd_max, top_n, _uploaded_file) -> dict:
+    """Filtre, analyse et catégorise les optimisations ; renvoie un dict sérialisable pour le cache"""
+    analyzer = MQL5OptimizationAnalyzer()
+    if _is_large_csv(_uploaded_file.size, name):
+        # Seules les lignes retenues sont gardées en mémoire
+        analyzer.data, n_total = _read_csv_filtered(analyzer, _uploaded_file.getvalue(), profit_min, dd_max)
+    else:
+        analyzer.data = _load_df(file_key, name, _uploaded_file)
+        n_total = len(analyzer.data)
+    analyzer.filter_profitable_optimizations(min_profit=profit_min, max_drawdown=dd_max)
+
+    # Aucune optimisation retenue : inutile d'analyser des structures vides
+    if analyzer.filtered_data is None or len(analyzer.filtered_data) == 0:
+        return {
+            'n_total': n_total,
+            'n_filtered': 0,
+            'profit_col': analyzer._profit_col,
+            'filtered_data': analyzer.filtered_data,
+            'variable_stats': {},
+            'advanced_metrics': dict(_EMPTY_METRICS),
+            'best_optimizations': [],
+            'categorized_vars': {category: [] for category in ('signal', 'risk_management', 'timing', 'filter', 'other')}
+        }
+
+    analyzer.analyze_variables()
+
+    # Vérification de compatibilité avec Streamlit Cloud
+    calculate_metrics = getattr(analyzer, 'calculate_advanced_metrics', None)
+    if calculate_metrics is not None:
+        calculate_metrics()
+
+    analyzer.find_best_optimizations(top_n=top_n)
+
+    categorized_vars = analyzer.categorize_variables()
+
+    return {
+        'n_total': n_total,
+        'n_filtered': 0 if analyzer.filtered_data is None else len(analyzer.filtered_data),
+        'profit_col': analyzer._profit_col,
+        'filtered_data': _downcast_for_display(analyzer.filtered_data),
+        'variable_stats': analyzer.variable_stats,
+        'advanced_metrics': analyzer.advanced_metrics if calculate_metrics is not None else None,
+        'best_optimizations': analyzer.best_optimizations,
+        'categorized_vars': categorized_vars
+    }
+
+def analyze_optimizations_v2(uploaded_file, profit_min, dd_max, top_n):
     """Analyse avancée des optimisations V2"""
 
     progress_bar = st.progress(0)
@@ -251,85 +421,60 @@ def analyze_optimizations_v2(uploaded_file, profit_min, dd_max, top_n,
         status_text.text("📂 Chargement du fichier...")
         progress_bar.progress(20)
 
-        # Lecture du fichier avec gestion XML améliorée
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith('.xml'):
+        if uploaded_file.name.endswith('.xml'):
             st.info("🔧 Traitement spécialisé du fichier XML MetaTrader 5...")
 
-            with open("temp_file.xml", "wb") as f:
-                f.write(uploaded_file.getvalue())
-
-            try:
-                df = pd.read_excel("temp_file.xml", engine='openpyxl')
-            except:
-                try:
-                    df = parse_mt5_xml("temp_file.xml")
-                except Exception as e:
-                    st.error(f"[ERREUR] Impossible de lire le XML: {e}")
-                    return
-            finally:
-                import os
-                if os.path.exists("temp_file.xml"):
-                    os.remove("temp_file.xml")
-        else:
-            df = pd.read_excel(uploaded_file)
+        # Lecture du fichier (mise en cache sur son identifiant, sans copie si déjà chargé)
+        file_key = _file_key(uploaded_file)
+        try:
+            # Un gros CSV n'est jamais chargé en entier : il est filtré pendant l'analyse
+            df = (None if _is_large_csv(uploaded_file.size, uploaded_file.name)
+                  else _load_df(file_key, uploaded_file.name, uploaded_file))
+        except Exception as e:
+            st.error(f"[ERREUR] Impossible de lire le fichier: {e}")
+            return
 
         progress_bar.progress(40)
 
-        # Étape 2: Analyse
+        # Étape 2: Analyse (mise en cache ; les options d'affichage n'en font pas partie)
         status_text.text("🔍 Analyse avancée des données...")
-
-        analyzer = MQL5OptimizationAnalyzer()
-        analyzer.data = df
-        analyzer.filter_profitable_optimizations(min_profit=profit_min, max_drawdown=dd_max)
+        results = _run_analysis(file_key, uploaded_file.name, profit_min, dd_max, top_n, uploaded_file)
 
         progress_bar.progress(60)
 
-        # Calculs avancés
-        analyzer.analyze_variables()
-
-        # Vérification de compatibilité avec Streamlit Cloud
-        if hasattr(analyzer, 'calculate_advanced_metrics'):
-            analyzer.calculate_advanced_metrics()
+        analyzer = MQL5OptimizationAnalyzer()
+        analyzer.data = df if df is not None else results['filtered_data']
+        # Compteurs calculés une fois, lus ensuite par tous les onglets
+        analyzer.n_total = results['n_total']
+        analyzer.n_filtered = results['n_filtered']
+        analyzer.profit_col = results['profit_col']
+        analyzer.filtered_data = results['filtered_data']
+        analyzer.variable_stats = results['variable_stats']
+        analyzer.best_optimizations = results['best_optimizations']
+
+        if results['advanced_metrics'] is not None:
+            analyzer.advanced_metrics = results['advanced_metrics']
         else:
             st.warning("⚠️ Métriques avancées temporairement indisponibles (problème cache Streamlit Cloud)")
-            # Création manuelle des métriques de base
-            analyzer.advanced_metrics = {
-                'total_optimizations': len(analyzer.filtered_data) if analyzer.filtered_data is not None else 0,
-                'total_profit': 0,
-                'average_profit': 0,
-                'max_profit': 0,
-                'min_profit': 0,
-                'max_drawdown': 0,
-                'win_rate': 0,
-                'profit_factor': 0,
-                'risk_reward_ratio': 0,
-                'sharpe_ratio': 0,
-                'calmar_ratio': 0,
-                'recovery_factor': 0
-            }
-
-        analyzer.find_best_optimizations(top_n=top_n)
+            # Métriques de base à zéro (copie de la constante partagée)
+            analyzer.advanced_metrics = dict(_EMPTY_METRICS)
+            analyzer.advanced_metrics['total_optimizations'] = analyzer.n_filtered
 
         progress_bar.progress(80)
 
-        # Catégorisation
-        categorized_vars = analyzer.categorize_variables()
+        categorized_vars = results['categorized_vars']
 
         progress_bar.progress(100)
         status_text.text("✅ Analyse V2 terminée!")
 
         # Affichage des résultats avec onglets
-        display_results_v2(analyzer, categorized_vars, profit_min, dd_max,
-                          show_sharpe, show_calmar, show_recovery, show_rr)
+        display_results_v2(analyzer, categorized_vars, profit_min, dd_max)
 
     except Exception as e:
         st.error(f"[ERREUR] Erreur durant l'analyse V2: {str(e)}")
         st.exception(e)
 
-def display_results_v2(analyzer, categorized_vars, profit_min, dd_max,
-                      show_sharpe, show_calmar, show_recovery, show_rr):
+def display_results_v2(analyzer, categorized_vars, profit_min, dd_max):
     """Affichage des résultats V2 avec onglets"""
 
     st.markdown("---")
@@ -357,13 +502,13 @@ def display_results_v2(analyzer, categorized_vars, profit_min, dd_max,
         display_category_analysis(analyzer, categorized_vars['timing'], "Variables de Timing", "⏰")
 
     with tab_advanced:
-        display_advanced_metrics(analyzer, show_sharpe, show_calmar, show_recovery, show_rr)
+        display_advanced_metrics(analyzer)
 
 def display_overview(analyzer, profit_min, dd_max):
     """Affichage de la vue d'ensemble"""
 
-    total_opts = len(analyzer.data) if analyzer.data is not None else 0
-    profitable_opts = len(analyzer.filtered_data) if analyzer.filtered_data is not None else 0
+    total_opts = analyzer.n_total
+    profitable_opts = analyzer.n_filtered
     success_rate = (profitable_opts / total_opts * 100) if total_opts > 0 else 0
 
     # Métriques principales avec style
@@ -408,22 +553,23 @@ def display_overview(analyzer, profit_min, dd_max):
         return
 
     # Graphique de distribution
-    if analyzer.filtered_data is not None:
-        profit_cols = [col for col in analyzer.filtered_data.columns if 'profit' in col.lower()]
-        if profit_cols:
-            fig = px.histogram(
-                analyzer.filtered_data,
-                x=profit_cols[0],
-                title="📊 Distribution des Profits",
-                nbins=30,
-                color_discrete_sequence=['#1f77b4']
-            )
-            fig.update_layout(
-                xaxis_title="Profit (€)",
-                yaxis_title="Nombre d'optimisations",
-                template="plotly_white"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    if analyzer.filtered_data is not None and analyzer.profit_col is not None:
+        # Classes calculées avec numpy, seules les barres sont envoyées à plotly ;
+        # la colonne (déjà en float32 pour l'affichage) est lue sans copie
+        go, _ = _plotly()
+        profits = analyzer.filtered_data[analyzer.profit_col].to_numpy(copy=False)
+        counts, edges = np.histogram(profits, bins=30)
+        centers = 0.5 * (edges[:-1] + edges[1:])
+
+        fig = go.Figure(go.Bar(x=centers, y=counts, marker_color='#1f77b4'))
+        fig.update_layout(
+            title="📊 Distribution des Profits",
+            xaxis_title="Profit (€)",
+            yaxis_title="Nombre d'optimisations",
+            template="plotly_white",
+            bargap=0.02
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
 def display_category_analysis(analyzer, variables, category_name, icon):
     """Affichage de l'analyse par catégorie"""
@@ -454,26 +600,54 @@ def display_category_analysis(analyzer, variables, category_name, icon):
                 with col2:
                     if stats['top_valeurs']:
                         st.markdown("**🏆 Top 5 valeurs :**")
-                        for i, top_val in enumerate(stats['top_valeurs'][:5], 1):
-                            # Format d'affichage amélioré : Variable + Valeur
-                            var_display = f"{var} {top_val['valeur']}"
-                            st.write(f"{i}. **{var_display}** → {top_val['profit_moyen']:.2f}€ (×{top_val['occurrences']})")
-
-                            # Affichage des profits min/moyen/max pour cette valeur spécifique
-                            if 'profit_min' in top_val and 'profit_max' in top_val:
-                                st.caption(f"   📊 Min: {top_val['profit_min']:.2f}€ | Moyen: {top_val['profit_moyen']:.2f}€ | Max: {top_val['profit_max']:.2f}€")
-
-                            # Affichage du R/R (toujours visible maintenant)
-                            if 'rr_ratio' in top_val:
-                                rr_info = f"   🎯 R/R Moyen: {top_val['rr_ratio']:.2f}"
-                                if 'rr_min' in top_val and 'rr_max' in top_val:
-                                    rr_info += f" | Min: {top_val['rr_min']:.2f} | Max: {top_val['rr_max']:.2f}"
-                                st.caption(rr_info)
-                            else:
-                                st.caption("   🎯 R/R: Non calculé")
-
-def display_advanced_metrics(analyzer, show_sharpe, show_calmar, show_recovery, show_rr):
-    """Affichage des métriques avancées"""
+                        # Un seul tableau par variable (R/R vide si non calculé)
+                        top_df = pd.DataFrame([{
+                            'Valeur': top_val['valeur'],
+                            'Profit moyen': top_val['profit_moyen'],
+                            'Min': top_val.get('profit_min'),
+                            'Max': top_val.get('profit_max'),
+                            'R/R': top_val.get('rr_ratio'),
+                            'R/R min': top_val.get('rr_min'),
+                            'R/R max': top_val.get('rr_max'),
+                            'Occ.': top_val['occurrences']
+                        } for top_val in stats['top_valeurs'][:5]])
+                        st.dataframe(
+                            top_df,
+                            hide_index=True,
+                            use_container_width=True,
+                            column_config={
+                                'Profit moyen': st.column_config.NumberColumn(format="%.2f€"),
+                                'Min': st.column_config.NumberColumn(format="%.2f€"),
+                                'Max': st.column_config.NumberColumn(format="%.2f€"),
+                                'R/R': st.column_config.NumberColumn(format="%.2f"),
+                                'R/R min': st.column_config.NumberColumn(format="%.2f"),
+                                'R/R max': st.column_config.NumberColumn(format="%.2f")
+                            }
+                        )
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV du tableau, écrit directement dans un buffer binaire ; mis en cache par contenu"""
+    csv_buffer = io.BytesIO()
+    df.to_csv(csv_buffer, index=False, encoding='utf-8')
+    return csv_buffer.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_json_blob(advanced_metrics, best_optimizations, variable_stats) -> bytes:
+    """Export JSON complet, sérialisé une fois par analyse (orjson si disponible)"""
+    json_data = {
+        'advanced_metrics': advanced_metrics,
+        'best_optimizations': best_optimizations,
+        'variable_stats': variable_stats
+    }
+    return dumps_json(json_data)
+
+@st.fragment
+def display_advanced_metrics(analyzer):
+    """Affichage des métriques avancées
+
+    Fragment Streamlit : cocher une métrique ne relance que ce bloc, pas tout le script.
+    """
 
     if not analyzer.advanced_metrics:
         st.warning("Métriques avancées non disponibles")
@@ -483,6 +657,13 @@ def display_advanced_metrics(analyzer, show_sharpe, show_calmar, show_recovery,
 
     st.markdown('<div class="category-header">📊 Métriques Avancées de Trading</div>', unsafe_allow_html=True)
 
+    # Choix des métriques affichées (widgets internes au fragment)
+    toggle_cols = st.columns(4)
+    show_sharpe = toggle_cols[0].checkbox("Sharpe Ratio", value=True, key='show_sharpe')
+    show_calmar = toggle_cols[1].checkbox("Calmar Ratio", value=True, key='show_calmar')
+    show_recovery = toggle_cols[2].checkbox("Recovery Factor", value=True, key='show_recovery')
+    show_rr = toggle_cols[3].checkbox("Risk/Reward Ratio", value=True, key='show_rr')
+
     # Métriques de performance
     col1, col2, col3, col4 = st.columns(4)
 
@@ -507,63 +688,64 @@ def display_advanced_metrics(analyzer, show_sharpe, show_calmar, show_recovery,
             st.metric("🔄 Recovery Factor", f"{metrics['recovery_factor']:.2f}")
 
     # Graphiques de distribution des gains/pertes
-    if analyzer.filtered_data is not None:
-        profit_cols = [col for col in analyzer.filtered_data.columns if 'profit' in col.lower()]
-        if profit_cols:
-            profits = analyzer.filtered_data[profit_cols[0]]
-
-            fig = make_subplots(
-                rows=1, cols=2,
-                subplot_titles=('Distribution Profits/Pertes', 'Analyse Win/Loss'),
-                specs=[[{"secondary_y": False}, {"type": "pie"}]]
-            )
-
-            # Histogramme
-            fig.add_trace(
-                go.Histogram(x=profits, nbinsx=30, name="Distribution", marker_color='lightblue'),
-                row=1, col=1
-            )
-
-            # Pie chart Win/Loss
-            win_count = len(profits[profits > 0])
-            loss_count = len(profits[profits <= 0])
-
-            fig.add_trace(
-                go.Pie(
-                    labels=['Gains', 'Pertes'],
-                    values=[win_count, loss_count],
-                    marker_colors=['lightgreen', 'lightcoral']
-                ),
-                row=1, col=2
-            )
-
-            fig.update_layout(height=400, showlegend=False, template="plotly_white")
-            st.plotly_chart(fig, use_container_width=True)
+    if analyzer.filtered_data is not None and analyzer.profit_col is not None:
+        # Un seul tableau numpy pour l'histogramme et le camembert
+        profit_values = analyzer.filtered_data[analyzer.profit_col].to_numpy(copy=False)
+        counts, edges = np.histogram(profit_values, bins=30)
+        centers = 0.5 * (edges[:-1] + edges[1:])
+
+        go, make_subplots = _plotly()
+        fig = make_subplots(
+            rows=1, cols=2,
+            subplot_titles=('Distribution Profits/Pertes', 'Analyse Win/Loss'),
+            specs=[[{"secondary_y": False}, {"type": "pie"}]]
+        )
+
+        # Histogramme (classes déjà calculées : seules les 30 barres partent au navigateur)
+        fig.add_trace(
+            go.Bar(x=centers, y=counts, name="Distribution", marker_color='lightblue'),
+            row=1, col=1
+        )
+
+        # Pie chart Win/Loss : un seul comptage vectorisé
+        win_count = int(np.count_nonzero(profit_values > 0))
+        loss_count = int(np.count_nonzero(profit_values <= 0))
+
+        fig.add_trace(
+            go.Pie(
+                labels=['Gains', 'Pertes'],
+                values=[win_count, loss_count],
+                marker_colors=['lightgreen', 'lightcoral']
+            ),
+            row=1, col=2
+        )
+
+        fig.update_layout(height=400, showlegend=False, template="plotly_white", bargap=0.02)
+        st.plotly_chart(fig, use_container_width=True)
 
     # Tableau des meilleures optimisations
     if analyzer.best_optimizations:
         st.subheader("🏆 Top Optimisations")
 
+        # Profit gardé numérique (tri correct) ; format € appliqué à l'affichage
         best_df = pd.DataFrame(analyzer.best_optimizations)
-        if 'profit' in best_df.columns:
-            best_df['profit'] = best_df['profit'].apply(lambda x: f"{x:,.2f}€")
 
-        st.dataframe(best_df, use_container_width=True, height=400)
+        st.dataframe(
+            best_df,
+            use_container_width=True,
+            height=400,
+            column_config={'profit': st.column_config.NumberColumn(format="%.2f€")}
+        )
 
         # Boutons de téléchargement
         col1, col2 = st.columns(2)
         with col1:
-            csv = best_df.to_csv(index=False)
-            st.download_button("📥 CSV", csv, "optimisations_v2.csv", "text/csv")
+            st.download_button("📥 CSV", _csv_bytes(best_df), "optimisations_v2.csv", "text/csv")
 
         with col2:
-            json_data = {
-                'advanced_metrics': analyzer.advanced_metrics,
-                'best_optimizations': analyzer.best_optimizations,
-                'variable_stats': analyzer.variable_stats
-            }
-            json_str = json.dumps(json_data, ensure_ascii=False, indent=2, default=str)
-            st.download_button("📥 JSON Complet", json_str, "analyse_v2.json", "application/json")
+            json_blob = _build_json_blob(analyzer.advanced_metrics, analyzer.best_optimizations,
+                                         analyzer.variable_stats)
+            st.download_button("📥 JSON Complet", json_blob, "analyse_v2.json", "application/json")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,7 +4,7 @@
 Exemple d'utilisation de l'analyseur d'optimisations MQL5
 """
 
-from mql5_optimization_analyzer import MQL5OptimizationAnalyzer
+from mql5_optimization_analyzer import MQL5OptimizationAnalyzer, wait_for_writes
 import os
 
 def analyze_my_optimizations():
@@ -58,8 +58,15 @@ def analyze_my_optimizations():
 
     # 5. Générer les rapports
     print("📄 Génération des rapports...")
-    analyzer.generate_report("mon_rapport_optimisations.txt")
-    analyzer.save_json_data("mes_donnees_optimisations.json")
+    # Les fichiers sont écrits en arrière-plan : on attend la fin des écritures
+    writes = [
+        analyzer.generate_report("mon_rapport_optimisations.txt"),
+        analyzer.save_json_data("mes_donnees_optimisations.json"),
+    ]
+    wait_for_writes()
+    if any(write.exception() is not None for write in writes):
+        print("❌ Échec de l'écriture des rapports")
+        return False
 
     print("\n✅ ANALYSE TERMINÉE!")
     print("📖 Consultez 'mon_rapport_optimisations.txt' pour les résultats détaillés")
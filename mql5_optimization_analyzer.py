@@ -12,15 +12,370 @@ from collections import defaultdict
 import xml.etree.ElementTree as ET
 from typing import Dict, List, Tuple
 import os
+import re
+import sys
 import json
+import queue
+import atexit
+import threading
+import importlib.util
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from xml.parsers import expat
+
+# Dépendances facultatives détectées sans être importées : polars n'est chargé
+# que par MQL5OptimizationAnalyzerPolars, numba au premier calcul de métriques,
+# numexpr au premier filtrage (démarrage à froid de Streamlit plus court)
+POLARS_AVAILABLE = importlib.util.find_spec('polars') is not None
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+NUMEXPR_AVAILABLE = importlib.util.find_spec('numexpr') is not None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Colonnes Arrow à la lecture des classeurs (pandas >= 2.0), sans importer pyarrow ici
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Préfixes des messages : emoji si la console est en UTF-8, ASCII sinon (console Windows cp1252)
+_CONSOLE_UTF8 = (getattr(sys.stdout, 'encoding', None) or '').lower().replace('-', '') == 'utf8'
+LOG_PREFIXES = {
+    key: emoji if _CONSOLE_UTF8 else ascii_prefix
+    for key, (ascii_prefix, emoji) in {
+        'ok': ('[OK]', '✅'),
+        'info': ('[INFO]', '🔍'),
+        'erreur': ('[ERREUR]', '❌'),
+        'warning': ('[WARNING]', '⚠️'),
+        'profit': ('[PROFIT]', '💰'),
+        'dd': ('[DD]', '📉'),
+    }.items()
+}
+
+# Mots-clés (en minuscules) de détection des colonnes
+PROFIT_KEYWORDS = frozenset(['profit', 'gain', 'resultat'])
+DD_KEYWORDS = frozenset(['drawdown', 'dd', 'perte'])
+RESULT_KEYWORDS = frozenset(['profit', 'gain', 'drawdown', 'dd', 'trades', 'total', 'net', 'gross', 'balance', 'equity'])
+
+SS_NS = 'urn:schemas-microsoft-com:office:spreadsheet'
+# Même espace de noms en préfixe de balise lxml/ElementTree ('{uri}Row'), partagé avec les apps
+SS_TAG = '{' + SS_NS + '}'
+
+# Écritures disque (rapport, JSON) confiées à un thread de fond : l'analyse suivante n'attend pas l'I/O
+_WRITE_QUEUE = queue.Queue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+
+def _writer_loop():
+    """Consomme la file et écrit chaque fichier ; succès et échec sont signalés après l'écriture"""
+    while True:
+        output_file, payload, future, log, success_message = _WRITE_QUEUE.get()
+        try:
+            with open(output_file, 'wb') as f:
+                f.write(payload)
+        except Exception as e:
+            # Toute erreur (OSError, chemin None ou contenant \0...) est rendue au Future :
+            # le thread doit survivre, sinon la file et wait_for_writes() resteraient bloquées
+            log(f"{LOG_PREFIXES['erreur']} Ecriture impossible de {output_file}: {e}")
+            future.set_exception(e)
+        else:
+            log(success_message)
+            future.set_result(output_file)
+        finally:
+            _WRITE_QUEUE.task_done()
+
+
+def _write_in_background(output_file: str, payload: bytes, log=print, success_message: str = None) -> Future:
+    """Met un fichier en file d'écriture ; le thread est démarré au premier appel
+
+    Renvoie un Future : result() attend l'écriture et relève l'erreur éventuelle.
+    """
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_writer_loop, name='mql5-writer', daemon=True)
+            _writer_thread.start()
+    future = Future()
+    _WRITE_QUEUE.put((output_file, payload, future, log,
+                      success_message or f"{LOG_PREFIXES['ok']} Fichier ecrit: {output_file}"))
+    return future
+
+
+def wait_for_writes():
+    """Bloque jusqu'à ce que tous les fichiers en file soient écrits"""
+    _WRITE_QUEUE.join()
+
+
+# Le thread est daemon : on vide la file avant la sortie de l'interpréteur
+atexit.register(wait_for_writes)
+
+
+def _read_spreadsheet_xml(file_path: str) -> pd.DataFrame:
+    """Lit un export SpreadsheetML 2003 de MT5 en flux avec expat
+
+    buffer_text regroupe le texte d'une cellule en un seul appel au lieu
+    d'accumuler des fragments ; seule la première feuille est lue.
+    """
+    parser = expat.ParserCreate(namespace_separator='}')
+    parser.buffer_text = True
+    parser.buffer_size = 1 << 20
+
+    rows = []
+    state = {'row': None, 'text': None, 'done': False}
+    index_attr = SS_NS + '}Index'
+
+    def start(name, attrs):
+        if state['done']:
+            return
+        tag = name.rpartition('}')[2]
+        if tag == 'Row':
+            state['row'] = []
+        elif tag == 'Cell' and state['row'] is not None:
+            row = state['row']
+            index = attrs.get(index_attr)
+            if index:
+                # ss:Index (1-based) saute les cellules vides
+                row.extend([None] * (int(index) - 1 - len(row)))
+            row.append(None)
+        elif tag == 'Data' and state['row'] is not None:
+            state['text'] = []
+
+    def end(name):
+        if state['done']:
+            return
+        tag = name.rpartition('}')[2]
+        if tag == 'Data' and state['text'] is not None:
+            state['row'][-1] = ''.join(state['text'])
+            state['text'] = None
+        elif tag == 'Row' and state['row'] is not None:
+            rows.append(state['row'])
+            state['row'] = None
+        elif tag == 'Worksheet':
+            state['done'] = True
+
+    def characters(data):
+        if state['text'] is not None:
+            state['text'].append(data)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = characters
+
+    with open(file_path, 'rb') as f:
+        parser.ParseFile(f)
+
+    if not rows:
+        return pd.DataFrame()
+
+    headers = rows[0]
+    width = max(len(row) for row in rows)
+    headers = headers + [f'Colonne_{i + 1}' for i in range(len(headers), width)]
+    data = [row + [None] * (width - len(row)) for row in rows[1:]]
+
+    df = pd.DataFrame(data, columns=headers)
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def _column_stats_kernel(values):
+    """Statistiques d'une colonne en une seule passe (NaN ignorés), compilée par numba
+
+    Renvoie (n, total, moyenne, min, max, écart-type, n_gains, somme_gains,
+    n_pertes, somme_pertes) ; variance de Welford.
+    """
+    n = 0
+    total = 0.0
+    mean = 0.0
+    m2 = 0.0
+    vmin = np.inf
+    vmax = -np.inf
+    win_n = 0
+    win_sum = 0.0
+    loss_n = 0
+    loss_sum = 0.0
+
+    for x in values:
+        if np.isnan(x):
+            continue
+        n += 1
+        total += x
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        if x < vmin:
+            vmin = x
+        if x > vmax:
+            vmax = x
+        if x > 0:
+            win_n += 1
+            win_sum += x
+        elif x < 0:
+            loss_n += 1
+            loss_sum += x
+
+    if n == 0:
+        return 0, 0.0, np.nan, np.nan, np.nan, np.nan, 0, 0.0, 0, 0.0
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    return n, total, total / n, vmin, vmax, std, win_n, win_sum, loss_n, loss_sum
+
+
+def _column_stats_numpy(values):
+    """Mêmes statistiques que _column_stats_kernel, en réductions numpy (sans numba)"""
+    valid = values[~np.isnan(values)]
+    n = int(valid.size)
+    if n == 0:
+        return 0, 0.0, float('nan'), float('nan'), float('nan'), float('nan'), 0, 0.0, 0, 0.0
+
+    wins = valid[valid > 0]
+    losses = valid[valid < 0]
+    std = float(valid.std(ddof=1)) if n > 1 else float('nan')
+    return (n, float(valid.sum()), float(valid.mean()), float(valid.min()), float(valid.max()), std,
+            int(wins.size), float(wins.sum()), int(losses.size), float(losses.sum()))
+
+
+@lru_cache(maxsize=1)
+def _column_stats_impl():
+    """Implémentation retenue : numba n'est importé (et le noyau compilé) qu'au premier appel"""
+    if NUMBA_AVAILABLE:
+        from numba import njit
+        return njit(cache=True)(_column_stats_kernel)
+    return _column_stats_numpy
+
+
+def _column_stats(values):
+    """Statistiques d'une colonne float64 en une passe (voir _column_stats_kernel)"""
+    return _column_stats_impl()(values)
+
+
+def _top_positions(values, top_n: int):
+    """Positions des top_n plus grandes valeurs, triées par valeur décroissante
+
+    np.partition en O(n) au lieu d'un tri complet. Même résultat que nlargest :
+    à valeur égale la première ligne passe devant, les NaN ne complètent la
+    sélection qu'en dernier.
+    """
+    nan_mask = np.isnan(values)
+    valid = np.flatnonzero(~nan_mask)
+    k = min(max(top_n, 0), valid.size)
+
+    if k > 0:
+        v = values[valid]
+        kth = np.partition(v, v.size - k)[v.size - k]
+        above = valid[v > kth]
+        ties = valid[v == kth][:k - above.size]
+        positions = np.concatenate([above, ties])
+        positions = positions[np.lexsort((positions, -values[positions]))]
+    else:
+        positions = np.empty(0, dtype=np.intp)
+
+    if k < top_n:
+        positions = np.concatenate([positions, np.flatnonzero(nan_mask)[:top_n - k]])
+    return positions
+
+
+def _downcast_numeric(df, columns):
+    """Réduit les colonnes numériques au plus petit type sans perte (int8/16/32, float32)
+
+    Limité aux colonnes de paramètres (clés de groupby) : profit et drawdown
+    gardent leur type, les sommes groupées d'entiers courts pouvant déborder.
+    """
+    for col in columns:
+        values = df[col]
+        if values.dtype.kind == 'i':
+            df[col] = pd.to_numeric(values, downcast='integer')
+        elif values.dtype.kind == 'f':
+            # float32 uniquement si toutes les valeurs sont représentables exactement
+            as_float64 = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            as_float32 = as_float64.astype(np.float32)
+            if np.array_equal(as_float32, as_float64, equal_nan=True):
+                # Colonne Arrow (dtype_backend='pyarrow') : reste Arrow, en float32
+                df[col] = (values.astype('float32[pyarrow]') if isinstance(values.dtype, pd.ArrowDtype)
+                           else as_float32)
+    return df
+
+
+def _categorize_low_cardinality(df, columns, max_ratio: float = 0.02):
+    """Passe en 'category' les colonnes texte de paramètres peu variées (modes, drapeaux)
+
+    Les colonnes numériques sont déjà réduites à int8/int16 par _downcast_numeric,
+    soit la taille des codes d'une catégorie : seules les colonnes texte y gagnent.
+    """
+    n_rows = len(df)
+    for col in columns:
+        values = df[col]
+        if n_rows and pd.api.types.is_string_dtype(values.dtype) and values.nunique() / n_rows < max_ratio:
+            df[col] = values.astype('category')
+    return df
+
+
+def _keywords_regex(keywords):
+    """Alternance compilée de mots-clés recherchés en sous-chaîne d'un nom normalisé"""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+
+def _normalize_name(col) -> str:
+    """Nom de colonne en minuscules et sans accents ('Résultat' -> 'resultat')"""
+    name = unicodedata.normalize('NFKD', str(col).casefold())
+    return ''.join(ch for ch in name if not unicodedata.combining(ch))
+
+
+def dumps_json(data) -> bytes:
+    """Sérialise en JSON UTF-8 indenté : orjson (numpy natif, en C) si disponible, module json sinon
+
+    Utilisé par save_json_data et par les exports des apps Streamlit.
+    """
+    if orjson is not None:
+        try:
+            # default=str n'est appelé que pour les types inconnus d'orjson
+            return orjson.dumps(
+                data,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            # Clé de dict qu'orjson refuse (ex: scalaire numpy) : repli sur json
+            pass
+    return json.dumps(data, ensure_ascii=False, indent=2, default=str).encode('utf-8')
+
+
+def _read_excel(source, arrow: bool = PYARROW_AVAILABLE) -> pd.DataFrame:
+    """Lit un classeur Excel (chemin ou flux) : calamine (Rust) si disponible, moteur par défaut sinon
+
+    Le moteur par défaut de pandas choisit openpyxl (.xlsx) ou xlrd (.xls). Avec
+    arrow, les colonnes sont adossées à Arrow : le texte est stocké dans un
+    buffer contigu au lieu d'un objet Python par cellule.
+    """
+    options = {'dtype_backend': 'pyarrow'} if arrow else {}
+    try:
+        return pd.read_excel(source, engine='calamine', **options)
+    except Exception:
+        # calamine absent ou classeur refusé : le flux est rembobiné pour le second essai
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return pd.read_excel(source, **options)
+
 
 class MQL5OptimizationAnalyzer:
     def __init__(self):
+        # Sortie des messages, remplaçable (ex: logging.getLogger(__name__).info)
+        self._log = print
         self.data = None
         self.filtered_data = None
         self.variable_stats = {}
         self.best_optimizations = []
         self.advanced_metrics = {}
+        self._columns_key = None
+        self._profit_col = None
+        self._dd_col = None
+        self._trades_col = None
+        self._variable_cols = []
+        self._cols_lower = []
         self.variable_categories = {
             'signal': ['rsi', 'ma', 'ema', 'sma', 'macd', 'bollinger', 'stoch', 'period'],
             'risk_management': ['sl', 'tp', 'stop', 'take', 'risk', 'position', 'lot'],
@@ -28,105 +383,226 @@ class MQL5OptimizationAnalyzer:
             'filter': ['filter', 'confirm', 'trend', 'volume']
         }
 
+        # Une alternance compilée par catégorie : un seul parcours du nom de colonne
+        self._result_re = _keywords_regex(['profit', 'gain', 'drawdown', 'dd', 'trades', 'total', 'net', 'gross',
+                                           'balance', 'equity', 'result', 'pass'])
+        self._category_res = {category: _keywords_regex(keywords)
+                              for category, keywords in self.variable_categories.items()}
+
     def load_excel_xml(self, file_path: str):
         """Charge les données depuis un fichier Excel XML"""
         try:
-            # Tentative de lecture directe avec pandas
-            self.data = pd.read_excel(file_path)
-            print(f"[OK] Fichier charge: {len(self.data)} optimisations trouvees")
-            print(f"[INFO] Colonnes disponibles: {list(self.data.columns)}")
+            # Un .xml qui ne commence pas par PK (zip xlsx) est un export SpreadsheetML de MT5
+            with open(file_path, 'rb') as f:
+                is_zip = f.read(2) == b'PK'
+            if file_path.lower().endswith('.xml') and not is_zip:
+                self.data = _read_spreadsheet_xml(file_path)
+            else:
+                self.data = _read_excel(file_path)
+            self._detect_columns(self.data.columns)
+            _downcast_numeric(self.data, self._value_cols())
+            _categorize_low_cardinality(self.data, self._value_cols())
+            self._log(f"{LOG_PREFIXES['ok']} Fichier charge: {len(self.data)} optimisations trouvees")
+            self._log(f"{LOG_PREFIXES['info']} Colonnes disponibles: {list(self.data.columns)}")
             return True
         except Exception as e:
-            print(f"[ERREUR] Erreur de chargement: {e}")
+            self._log(f"{LOG_PREFIXES['erreur']} Erreur de chargement: {e}")
             return False
 
+    @property
+    def filtered_data(self):
+        """Optimisations retenues par le filtre, extraites de data à la demande"""
+        if self._filtered_data is None and self._filter_rows is not None:
+            # take() crée directement le sous-ensemble, sans copie supplémentaire
+            data, rows = self._filter_rows
+            self._filtered_data = data.take(rows)
+            self._filter_rows = None
+        return self._filtered_data
+
+    @filtered_data.setter
+    def filtered_data(self, value):
+        self._filtered_data = value
+        self._filter_rows = None
+
+    def _detect_columns(self, columns):
+        """Repère en une passe les colonnes profit, drawdown, trades et variables"""
+        profit_col = dd_col = trades_col = None
+        variable_cols = []
+        cols_lower = [_normalize_name(col) for col in columns]
+
+        for col, col_lower in zip(columns, cols_lower):
+            if profit_col is None and any(keyword in col_lower for keyword in PROFIT_KEYWORDS):
+                profit_col = col
+            if dd_col is None and any(keyword in col_lower for keyword in DD_KEYWORDS):
+                dd_col = col
+            if trades_col is None and 'trades' in col_lower:
+                trades_col = col
+            if not any(keyword in col_lower for keyword in RESULT_KEYWORDS):
+                variable_cols.append(col)
+
+        # Une colonne nommée exactement 'Profit' l'emporte : 'Résultat' (critère
+        # d'optimisation des exports français) ou 'Profit Factor' peuvent la précéder
+        exact_profit = next((col for col, col_lower in zip(columns, cols_lower) if col_lower == 'profit'), None)
+        if exact_profit is not None:
+            profit_col = exact_profit
+
+        self._columns_key = tuple(columns)
+        self._profit_col = profit_col
+        self._dd_col = dd_col
+        self._trades_col = trades_col
+        self._variable_cols = variable_cols
+        self._cols_lower = cols_lower
+
+    def _columns(self, df):
+        """Colonnes détectées pour df ; nouvelle détection seulement si ses colonnes ont changé"""
+        if self._columns_key != tuple(df.columns):
+            self._detect_columns(df.columns)
+
+    def _value_cols(self):
+        """Variables à analyser : colonnes de variables hors colonnes profit et drawdown"""
+        return [col for col in self._variable_cols if col not in (self._profit_col, self._dd_col)]
+
     def filter_profitable_optimizations(self, min_profit: float = 7000, max_drawdown: float = 7.0):
         """Filtre les optimisations selon les critères de profit et drawdown"""
         if self.data is None:
-            print("[ERREUR] Aucune donnee chargee")
+            self._log(f"{LOG_PREFIXES['erreur']} Aucune donnee chargee")
             return
 
         # Recherche automatique des colonnes profit et drawdown
-        profit_cols = [col for col in self.data.columns if 'profit' in col.lower() or 'gain' in col.lower() or 'resultat' in col.lower()]
-        dd_cols = [col for col in self.data.columns if 'drawdown' in col.lower() or 'dd' in col.lower() or 'perte' in col.lower()]
+        self._columns(self.data)
+        profit_col = self._profit_col
+        dd_col = self._dd_col
 
-        if not profit_cols:
-            print("[WARNING] Colonne profit non trouvee. Colonnes disponibles:")
-            print(list(self.data.columns))
+        if not profit_col:
+            self._log(f"{LOG_PREFIXES['warning']} Colonne profit non trouvee. Colonnes disponibles:")
+            self._log(list(self.data.columns))
             return
 
-        profit_col = profit_cols[0]
-        dd_col = dd_cols[0] if dd_cols else None
-
-        print(f"[PROFIT] Utilisation colonne profit: {profit_col}")
+        self._log(f"{LOG_PREFIXES['profit']} Utilisation colonne profit: {profit_col}")
         if dd_col:
-            print(f"[DD] Utilisation colonne drawdown: {dd_col}")
+            self._log(f"{LOG_PREFIXES['dd']} Utilisation colonne drawdown: {dd_col}")
 
-        # Filtrage
-        mask = self.data[profit_col] >= min_profit
-
-        if dd_col:
-            # Convertir les pourcentages négatifs en positifs si nécessaire
-            dd_values = abs(self.data[dd_col])
-            mask = mask & (dd_values <= max_drawdown)
-
-        self.filtered_data = self.data[mask].copy()
-
-        print(f"[OK] {len(self.filtered_data)} optimisations filtrees (profit >= {min_profit} euros, DD <= {max_drawdown}%)")
+        # Filtrage (drawdown pris en valeur absolue : pourcentages négatifs acceptés)
+        self.filtered_data = None
+        rows = np.flatnonzero(self._filter_mask(profit_col, dd_col, min_profit, max_drawdown))
+        self._filter_rows = (self.data, rows)
+
+        self._log(f"{LOG_PREFIXES['ok']} {len(self._filter_rows[1])} optimisations filtrees (profit >= {min_profit} euros, DD <= {max_drawdown}%)")
+
+    def _filter_mask(self, profit_col, dd_col, min_profit, max_drawdown) -> np.ndarray:
+        """Masque booléen profit/drawdown, évalué en une seule passe sans tableaux intermédiaires"""
+        profits = self.data[profit_col]
+        drawdowns = self.data[dd_col] if dd_col else None
+        numeric = pd.api.types.is_numeric_dtype(profits) and (
+            drawdowns is None or pd.api.types.is_numeric_dtype(drawdowns))
+
+        if NUMEXPR_AVAILABLE and numeric:
+            import numexpr as ne
+
+            # numexpr fusionne comparaisons, abs et & par blocs ; NaN -> False comme en pandas
+            local_dict = {'p': profits.to_numpy(dtype=np.float64, na_value=np.nan), 'mp': min_profit}
+            expression = "p >= mp"
+            if drawdowns is not None:
+                local_dict.update(d=drawdowns.to_numpy(dtype=np.float64, na_value=np.nan), md=max_drawdown)
+                expression = "(p >= mp) & (abs(d) <= md)"
+            return ne.evaluate(expression, local_dict=local_dict)
+
+        mask = profits.ge(min_profit)
+        if drawdowns is not None:
+            mask &= drawdowns.abs().le(max_drawdown)
+        return mask.to_numpy(dtype=bool, na_value=False)
 
     def analyze_variables(self):
         """Analyse les variables d'optimisation et calcule les statistiques"""
         if self.filtered_data is None or len(self.filtered_data) == 0:
-            print("[ERREUR] Aucune donnee filtree disponible")
+            self._log(f"{LOG_PREFIXES['erreur']} Aucune donnee filtree disponible")
             return
 
-        # Recherche des colonnes de variables (exclut les colonnes de résultats)
-        result_keywords = ['profit', 'gain', 'drawdown', 'dd', 'trades', 'total', 'net', 'gross', 'balance', 'equity']
-        variable_cols = []
-
-        for col in self.filtered_data.columns:
-            if not any(keyword in col.lower() for keyword in result_keywords):
-                variable_cols.append(col)
+        # Colonnes de variables (hors colonnes de résultats) et colonne profit
+        self._columns(self.filtered_data)
+        variable_cols = self._variable_cols
+        profit_col = self._profit_col
 
-        print(f"[INFO] Variables detectees: {variable_cols}")
-
-        # Trouve la colonne profit pour les calculs
-        profit_cols = [col for col in self.filtered_data.columns if 'profit' in col.lower() or 'gain' in col.lower() or 'resultat' in col.lower()]
-        profit_col = profit_cols[0] if profit_cols else None
+        self._log(f"{LOG_PREFIXES['info']} Variables detectees: {variable_cols}")
 
         if not profit_col:
-            print("[ERREUR] Colonne profit non trouvee pour l'analyse")
+            self._log(f"{LOG_PREFIXES['erreur']} Colonne profit non trouvee pour l'analyse")
             return
 
-        # Analyse chaque variable
-        for var_col in variable_cols:
-            try:
-                # Nettoie les données (enlève les NaN, convertit en numérique si possible)
-                clean_data = self.filtered_data[[var_col, profit_col]].dropna()
-
-                if len(clean_data) == 0:
-                    continue
-
-                # Groupe par valeur de variable
-                grouped = clean_data.groupby(var_col)[profit_col]
+        value_cols = self._value_cols()
+        computed = self._aggregate_variables(value_cols, profit_col)
+
+        for var_col in value_cols:
+            stats = computed.get(var_col)
+            if stats is not None:
+                self.variable_stats[var_col] = stats
+
+    def _aggregate_variables(self, value_cols, profit_col):
+        """Statistiques par valeur de chaque variable ; None si la variable n'a aucune valeur"""
+        computed = {}
+
+        # Format long : une ligne par (variable, valeur, profit), NaN exclus
+        keys = ['_variable', '_valeur']
+        long = self.filtered_data.melt(id_vars=[profit_col], value_vars=value_cols,
+                                       var_name='_variable', value_name='_valeur')
+
+        # melt empile les colonnes dans l'ordre : le nom de variable devient une
+        # catégorie construite depuis ses codes, sans refactoriser les chaînes à chaque groupby
+        long['_variable'] = pd.Categorical.from_codes(
+            np.repeat(np.arange(len(value_cols)), len(self.filtered_data)), categories=value_cols)
+        long = long.dropna()
+        profit = long[profit_col]
+
+        # Séparation autour de la médiane de chaque groupe, pour le R/R
+        above = profit >= long.groupby(keys, sort=False, observed=True)[profit_col].transform('median')
+        long = long.assign(_haut=profit.where(above), _bas=profit.where(~above))
+
+        # Une seule agrégation pour toutes les variables et toutes leurs valeurs
+        agg = long.groupby(keys, sort=False, observed=True).agg(
+            n=(profit_col, 'size'),
+            mean=(profit_col, 'mean'),
+            min=(profit_col, 'min'),
+            max=(profit_col, 'max'),
+            sum=(profit_col, 'sum'),
+            high_mean=('_haut', 'mean'),
+            high_min=('_haut', 'min'),
+            high_max=('_haut', 'max'),
+            low_n=('_bas', 'count'),
+            low_mean=('_bas', 'mean'),
+            low_min=('_bas', 'min'),
+            low_max=('_bas', 'max'),
+        )
+        profit_moyen = long.groupby('_variable', sort=False, observed=True)[profit_col].mean()
+
+        for var_col in value_cols:
+            if var_col not in profit_moyen.index:
+                computed[var_col] = None
+                continue
 
-                self.variable_stats[var_col] = {
-                    'occurrences': len(grouped),
-                    'valeurs_uniques': clean_data[var_col].nunique(),
-                    'profit_min': grouped.min().min(),
-                    'profit_max': grouped.max().max(),
-                    'profit_moyen': clean_data[profit_col].mean(),
+            try:
+                groups = agg.xs(var_col, level='_variable')
+                try:
+                    # melt a pu convertir les valeurs (int -> float) : type d'origine rétabli
+                    groups.index = groups.index.astype(self.filtered_data[var_col].dtype)
+                except (TypeError, ValueError):
+                    pass
+
+                # Tri par nombre d'occurrences décroissant (fiabilité), puis par valeur
+                groups = groups.sort_index().sort_values('n', ascending=False, kind='stable')
+
+                stats = {
+                    'occurrences': len(groups),
+                    'valeurs_uniques': len(groups),
+                    'profit_min': groups['min'].min(),
+                    'profit_max': groups['max'].max(),
+                    'profit_moyen': profit_moyen[var_col],
                     'top_valeurs': []
                 }
 
-                # Calcul du score composite pour classement intelligent
                 value_scores = []
-                for value in grouped.groups.keys():
-                    group_data = grouped.get_group(value)
-                    count = len(group_data)
-                    avg_profit = group_data.mean()
-                    min_profit = group_data.min()
-                    max_profit = group_data.max()
+                for value, row in groups.head(5).to_dict('index').items():
+                    count = row['n']
+                    avg_profit = row['mean']
 
                     # Score composite : fiabilité + performance
                     # Bonus pour les occurrences élevées + profit moyen élevé
@@ -136,71 +612,61 @@ class MQL5OptimizationAnalyzer:
 
                     # Calcul simplifié R/R pour cette valeur (basé sur les profits filtrés)
                     # Comme on a déjà filtré les profits >= min_profit, on calcule différemment
-                    profits_above_median = group_data[group_data >= group_data.median()]
-                    profits_below_median = group_data[group_data < group_data.median()]
-
-                    if len(profits_above_median) > 0 and len(profits_below_median) > 0:
-                        avg_high = profits_above_median.mean()
-                        avg_low = profits_below_median.mean()
-                        rr_ratio = avg_high / avg_low if avg_low > 0 else 1.0
-                        rr_min = profits_above_median.min() / profits_below_median.max() if profits_below_median.max() > 0 else 1.0
-                        rr_max = profits_above_median.max() / profits_below_median.min() if profits_below_median.min() > 0 else 2.0
+                    if row['low_n'] > 0:
+                        rr_ratio = row['high_mean'] / row['low_mean'] if row['low_mean'] > 0 else 1.0
+                        rr_min = row['high_min'] / row['low_max'] if row['low_max'] > 0 else 1.0
+                        rr_max = row['high_max'] / row['low_min'] if row['low_min'] > 0 else 2.0
                     else:
                         # Ratio simple basé sur la variance des profits
-                        rr_ratio = max_profit / avg_profit if avg_profit > 0 else 1.0
+                        rr_ratio = row['max'] / avg_profit if avg_profit > 0 else 1.0
                         rr_min = 1.0
                         rr_max = rr_ratio * 1.5
 
                     value_scores.append({
                         'valeur': value,
                         'profit_moyen': avg_profit,
-                        'profit_min': min_profit,
-                        'profit_max': max_profit,
+                        'profit_min': row['min'],
+                        'profit_max': row['max'],
                         'occurrences': count,
-                        'profit_total': group_data.sum(),
+                        'profit_total': row['sum'],
                         'score_composite': composite_score,
                         'rr_ratio': rr_ratio,
                         'rr_min': rr_min,
                         'rr_max': rr_max
                     })
 
-                # Tri par nombre d'occurrences décroissant (fiabilité)
-                value_scores.sort(key=lambda x: x['occurrences'], reverse=True)
-                self.variable_stats[var_col]['top_valeurs'] = value_scores[:5]
+                stats['top_valeurs'] = value_scores
+                computed[var_col] = stats
 
             except Exception as e:
-                print(f"[WARNING] Erreur analyse variable {var_col}: {e}")
+                self._log(f"{LOG_PREFIXES['warning']} Erreur analyse variable {var_col}: {e}")
+
+        return computed
 
     def calculate_advanced_metrics(self):
-        """Calcule les métriques avancées de trading"""
+        """Calcule les métriques avancées de trading (une passe par colonne)"""
         if self.filtered_data is None:
             return
 
         # Colonnes de base
-        profit_cols = [col for col in self.filtered_data.columns if 'profit' in col.lower()]
-        dd_cols = [col for col in self.filtered_data.columns if 'drawdown' in col.lower() or 'dd' in col.lower()]
-        trades_cols = [col for col in self.filtered_data.columns if 'trades' in col.lower()]
+        self._columns(self.filtered_data)
+        profit_col = self._profit_col
+        dd_col = self._dd_col
+        trades_col = self._trades_col
 
-        if not profit_cols:
+        if not profit_col:
             return
 
-        profit_col = profit_cols[0]
-        dd_col = dd_cols[0] if dd_cols else None
-        trades_col = trades_cols[0] if trades_cols else None
-
-        profits = self.filtered_data[profit_col]
-
-        # Métriques de base
-        total_profit = profits.sum()
-        avg_profit = profits.mean()
-        max_profit = profits.max()
-        min_profit = profits.min()
+        # Une seule passe sur la colonne profit (noyau numba si installé, numpy sinon)
+        profits = np.ascontiguousarray(self.filtered_data[profit_col].to_numpy(dtype=np.float64, na_value=np.nan))
+        n_profits = len(profits)
+        (_, total_profit, avg_profit, min_profit, max_profit, returns_std,
+         n_wins, win_sum, n_losses, loss_sum) = _column_stats(profits)
 
         # Risk/Reward et autres métriques
         if dd_col:
-            drawdowns = abs(self.filtered_data[dd_col])
-            max_dd = drawdowns.max()
-            avg_dd = drawdowns.mean()
+            drawdowns = np.abs(self.filtered_data[dd_col].to_numpy(dtype=np.float64, na_value=np.nan))
+            _, _, avg_dd, _, max_dd, _, _, _, _, _ = _column_stats(np.ascontiguousarray(drawdowns))
 
             # Calmar Ratio = Annual Return / Max Drawdown
             calmar_ratio = (avg_profit * 252) / max_dd if max_dd > 0 else 0
@@ -214,25 +680,21 @@ class MQL5OptimizationAnalyzer:
             recovery_factor = 0
 
         # Sharpe Ratio approximation
-        if len(profits) > 1:
-            returns_std = profits.std()
+        if n_profits > 1:
             sharpe_ratio = avg_profit / returns_std if returns_std > 0 else 0
         else:
             sharpe_ratio = 0
 
         # Win Rate et Profit Factor
-        winning_trades = profits[profits > 0]
-        losing_trades = profits[profits < 0]
-
-        win_rate = len(winning_trades) / len(profits) * 100 if len(profits) > 0 else 0
+        win_rate = n_wins / n_profits * 100 if n_profits > 0 else 0
 
-        total_wins = winning_trades.sum() if len(winning_trades) > 0 else 0
-        total_losses = abs(losing_trades.sum()) if len(losing_trades) > 0 else 1
+        total_wins = win_sum if n_wins > 0 else 0
+        total_losses = abs(loss_sum) if n_losses > 0 else 1
         profit_factor = total_wins / total_losses if total_losses > 0 else 0
 
         # Risk/Reward Ratio
-        avg_win = winning_trades.mean() if len(winning_trades) > 0 else 0
-        avg_loss = abs(losing_trades.mean()) if len(losing_trades) > 0 else 1
+        avg_win = total_wins / n_wins if n_wins > 0 else 0
+        avg_loss = total_losses / n_losses if n_losses > 0 else 1
         rr_ratio = avg_win / avg_loss if avg_loss > 0 else 0
 
         self.advanced_metrics = {
@@ -249,8 +711,8 @@ class MQL5OptimizationAnalyzer:
             'sharpe_ratio': sharpe_ratio,
             'calmar_ratio': calmar_ratio,
             'recovery_factor': recovery_factor,
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
+            'winning_trades': n_wins,
+            'losing_trades': n_losses,
             'average_win': avg_win,
             'average_loss': avg_loss
         }
@@ -268,23 +730,19 @@ class MQL5OptimizationAnalyzer:
             'other': []
         }
 
-        # Colonnes de résultats à exclure
-        result_keywords = ['profit', 'gain', 'drawdown', 'dd', 'trades', 'total', 'net', 'gross', 'balance', 'equity', 'result', 'pass']
+        # Noms normalisés calculés une fois par jeu de colonnes
+        self._columns(self.filtered_data)
 
-        for col in self.filtered_data.columns:
-            if any(keyword in col.lower() for keyword in result_keywords):
+        for col, name in zip(self.filtered_data.columns, self._cols_lower):
+            # Colonnes de résultats à exclure
+            if self._result_re.search(name):
                 continue
 
-            col_lower = col.lower()
-            categorized_flag = False
-
-            for category, keywords in self.variable_categories.items():
-                if any(keyword in col_lower for keyword in keywords):
+            for category, pattern in self._category_res.items():
+                if pattern.search(name):
                     categorized[category].append(col)
-                    categorized_flag = True
                     break
-
-            if not categorized_flag:
+            else:
                 categorized['other'].append(col)
 
         return categorized
@@ -292,77 +750,80 @@ class MQL5OptimizationAnalyzer:
     def find_best_optimizations(self, top_n: int = 10):
         """Trouve les meilleures optimisations"""
         if self.filtered_data is None:
-            print("[ERREUR] Aucune donnee filtree disponible")
+            self._log(f"{LOG_PREFIXES['erreur']} Aucune donnee filtree disponible")
             return
 
         # Trouve la colonne profit
-        profit_cols = [col for col in self.filtered_data.columns if 'profit' in col.lower() or 'gain' in col.lower() or 'resultat' in col.lower()]
-        profit_col = profit_cols[0] if profit_cols else None
+        self._columns(self.filtered_data)
+        profit_col = self._profit_col
 
         if not profit_col:
-            print("[ERREUR] Colonne profit non trouvee")
+            self._log(f"{LOG_PREFIXES['erreur']} Colonne profit non trouvee")
             return
 
-        # Trie par profit décroissant
-        best = self.filtered_data.nlargest(top_n, profit_col)
-
-        self.best_optimizations = []
-        for idx, row in best.iterrows():
-            opt = {'profit': row[profit_col]}
+        # Sélection partielle des top_n profits (O(n)) au lieu d'un tri complet
+        profits = self.filtered_data[profit_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        best = self.filtered_data.iloc[_top_positions(profits, top_n)]
 
-            # Ajoute toutes les variables
-            for col in self.filtered_data.columns:
-                if col != profit_col:
-                    opt[col] = row[col]
+        # Profit en tête et renommé 'profit', puis toutes les variables : une seule conversion
+        columns = list(best.columns)
+        other_cols = [col for col in columns if col != profit_col]
+        order = [columns.index(profit_col)] + [i for i, col in enumerate(columns) if col != profit_col]
+        best = best.iloc[:, order].set_axis(['profit'] + other_cols, axis=1)
 
-            self.best_optimizations.append(opt)
+        self.best_optimizations = best.to_dict(orient='records')
 
     def generate_report(self, output_file: str = "rapport_optimisations_mql5.txt"):
-        """Génère un rapport complet"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("         RAPPORT D'ANALYSE DES OPTIMISATIONS MQL5\n")
-            f.write("=" * 80 + "\n\n")
-
+        """Génère un rapport complet (lignes accumulées puis écrites en une fois)
+
+        L'écriture se fait en arrière-plan : le Future renvoyé permet d'attendre le fichier.
+        """
+        separator = "-" * 40
+        lines = [
+            "=" * 80,
+            "         RAPPORT D'ANALYSE DES OPTIMISATIONS MQL5",
+            "=" * 80,
+            "",
             # Résumé général
-            f.write("RESUME GENERAL\n")
-            f.write("-" * 40 + "\n")
-            if self.data is not None:
-                f.write(f"• Total optimisations: {len(self.data)}\n")
-            if self.filtered_data is not None:
-                f.write(f"• Optimisations profitables (>7000 euros, <7% DD): {len(self.filtered_data)}\n")
-                if len(self.data) > 0:
-                    success_rate = (len(self.filtered_data) / len(self.data)) * 100
-                    f.write(f"• Taux de succes: {success_rate:.1f}%\n")
-            f.write("\n")
-
-            # Analyse par variables
-            f.write("ANALYSE PAR VARIABLES\n")
-            f.write("-" * 40 + "\n")
-            for var_name, stats in self.variable_stats.items():
-                f.write(f"\n[{var_name}]\n")
-                f.write(f"   • Valeurs uniques testees: {stats['valeurs_uniques']}\n")
-                f.write(f"   • Profit minimum: {stats['profit_min']:.2f} euros\n")
-                f.write(f"   • Profit maximum: {stats['profit_max']:.2f} euros\n")
-                f.write(f"   • Profit moyen: {stats['profit_moyen']:.2f} euros\n")
-
-                f.write(f"   • Top 5 valeurs:\n")
-                for i, top_val in enumerate(stats['top_valeurs'], 1):
-                    f.write(f"     {i}. {top_val['valeur']} -> {top_val['profit_moyen']:.2f} euros (x{top_val['occurrences']})\n")
-
-            # Meilleures optimisations
-            f.write(f"\nTOP {len(self.best_optimizations)} MEILLEURES OPTIMISATIONS\n")
-            f.write("-" * 40 + "\n")
-            for i, opt in enumerate(self.best_optimizations, 1):
-                f.write(f"\n#{i} - Profit: {opt['profit']:.2f} euros\n")
-                for key, value in opt.items():
-                    if key != 'profit':
-                        f.write(f"   {key}: {value}\n")
-
-        print(f"[OK] Rapport genere: {output_file}")
+            "RESUME GENERAL",
+            separator,
+        ]
+        if self.data is not None:
+            lines.append(f"• Total optimisations: {len(self.data)}")
+        if self.filtered_data is not None:
+            lines.append(f"• Optimisations profitables (>7000 euros, <7% DD): {len(self.filtered_data)}")
+            if len(self.data) > 0:
+                success_rate = (len(self.filtered_data) / len(self.data)) * 100
+                lines.append(f"• Taux de succes: {success_rate:.1f}%")
+        lines.append("")
+
+        # Analyse par variables
+        lines += ["ANALYSE PAR VARIABLES", separator]
+        for var_name, stats in self.variable_stats.items():
+            lines += [
+                "",
+                f"[{var_name}]",
+                f"   • Valeurs uniques testees: {stats['valeurs_uniques']}",
+                f"   • Profit minimum: {stats['profit_min']:.2f} euros",
+                f"   • Profit maximum: {stats['profit_max']:.2f} euros",
+                f"   • Profit moyen: {stats['profit_moyen']:.2f} euros",
+                "   • Top 5 valeurs:",
+            ]
+            lines += [f"     {i}. {top_val['valeur']} -> {top_val['profit_moyen']:.2f} euros (x{top_val['occurrences']})"
+                      for i, top_val in enumerate(stats['top_valeurs'], 1)]
+
+        # Meilleures optimisations
+        lines += ["", f"TOP {len(self.best_optimizations)} MEILLEURES OPTIMISATIONS", separator]
+        for i, opt in enumerate(self.best_optimizations, 1):
+            lines += ["", f"#{i} - Profit: {opt['profit']:.2f} euros"]
+            lines += [f"   {key}: {value}" for key, value in opt.items() if key != 'profit']
+
+        # Fins de ligne natives, comme l'ancienne écriture en mode texte
+        return _write_in_background(output_file, (os.linesep.join(lines) + os.linesep).encode('utf-8'),
+                                    self._log, f"{LOG_PREFIXES['ok']} Rapport genere: {output_file}")
 
     def save_json_data(self, output_file: str = "optimisations_data.json"):
-        """Sauvegarde les données en JSON pour usage ultérieur"""
+        """Sauvegarde les données en JSON pour usage ultérieur (écriture en arrière-plan, Future renvoyé)"""
         data_export = {
             'variable_stats': self.variable_stats,
             'best_optimizations': self.best_optimizations,
@@ -372,50 +833,287 @@ class MQL5OptimizationAnalyzer:
             }
         }
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data_export, f, ensure_ascii=False, indent=2, default=str)
+        return _write_in_background(output_file, dumps_json(data_export),
+                                    self._log, f"{LOG_PREFIXES['ok']} Donnees sauvegardees: {output_file}")
+
+
+class MQL5OptimizationAnalyzerPolars(MQL5OptimizationAnalyzer):
+    """Analyseur dont le filtrage et l'agrégation par variable tournent sous polars
+
+    Le travail lourd reste en polars ; filtered_data est reconverti en pandas
+    et variable_stats garde exactement le format de la classe de base, pour que
+    l'affichage Streamlit, les graphiques et les rapports restent inchangés.
+    """
+
+    def __init__(self):
+        if not POLARS_AVAILABLE:
+            raise ImportError("polars n'est pas installe (pip install polars)")
+        super().__init__()
+        self._pl_data = None
+        self._pl_filtered = None
+
+    @staticmethod
+    def _to_polars(df):
+        import polars as pl
+        return df if isinstance(df, pl.DataFrame) else pl.from_pandas(df)
+
+    @staticmethod
+    def _to_pandas(df):
+        try:
+            return df.to_pandas()
+        except ImportError:
+            # to_pandas() passe par pyarrow ; sans lui on repasse par des listes Python
+            return pd.DataFrame(df.to_dict(as_series=False))
+
+    def _polars_data(self):
+        """Données en polars : celles du chargement si self.data n'a pas été remplacé depuis"""
+        if self._pl_data is None or self._pl_data[0] is not self.data:
+            self._pl_data = (self.data, self._to_polars(self.data))
+        return self._pl_data[1]
+
+    @property
+    def filtered_data(self):
+        """Optimisations retenues, converties en pandas seulement quand on les demande"""
+        if self._filtered_data is None and self._pl_filtered is not None:
+            self._filtered_data = self._to_pandas(self._pl_filtered)
+        return self._filtered_data
+
+    @filtered_data.setter
+    def filtered_data(self, value):
+        # Affectation directe : la version polars sera refaite depuis ce DataFrame
+        self._filtered_data = value
+        self._pl_filtered = None
+
+    def _polars_filtered(self):
+        """Données filtrées en polars (converties si filtered_data a été affecté directement)"""
+        if self._pl_filtered is None and self._filtered_data is not None:
+            self._pl_filtered = self._to_polars(self._filtered_data)
+        return self._pl_filtered
+
+    def load_excel_xml(self, file_path: str):
+        """Charge les données avec polars (moteur calamine), pandas en secours"""
+        import polars as pl
+        try:
+            data = pl.read_excel(file_path, engine="calamine")
+        except Exception as e:
+            # fastexcel absent ou fichier que calamine ne sait pas lire (SpreadsheetML 2003)
+            self._log(f"{LOG_PREFIXES['info']} Lecture polars impossible ({e}), lecture pandas")
+            return super().load_excel_xml(file_path)
+
+        # self.data reste un DataFrame pandas pour les méthodes héritées et les rapports
+        self.data = self._to_pandas(data)
+        self._pl_data = (self.data, data)
+        self._detect_columns(data.columns)
+        _downcast_numeric(self.data, self._value_cols())
+        _categorize_low_cardinality(self.data, self._value_cols())
+        self._log(f"{LOG_PREFIXES['ok']} Fichier charge: {len(self.data)} optimisations trouvees")
+        self._log(f"{LOG_PREFIXES['info']} Colonnes disponibles: {list(self.data.columns)}")
+        return True
+
+    def filter_profitable_optimizations(self, min_profit: float = 7000, max_drawdown: float = 7.0):
+        """Filtre les optimisations selon les critères de profit et drawdown (polars)"""
+        if self.data is None:
+            self._log(f"{LOG_PREFIXES['erreur']} Aucune donnee chargee")
+            return
+
+        data = self._polars_data()
+
+        self._columns(data)
+        profit_col = self._profit_col
+        dd_col = self._dd_col
+
+        if not profit_col:
+            self._log(f"{LOG_PREFIXES['warning']} Colonne profit non trouvee. Colonnes disponibles:")
+            self._log(list(data.columns))
+            return
+
+        self._log(f"{LOG_PREFIXES['profit']} Utilisation colonne profit: {profit_col}")
+        if dd_col:
+            self._log(f"{LOG_PREFIXES['dd']} Utilisation colonne drawdown: {dd_col}")
+
+        import polars as pl
+        predicate = pl.col(profit_col) >= min_profit
+        if dd_col:
+            predicate = predicate & (pl.col(dd_col).abs() <= max_drawdown)
+
+        self.filtered_data = None
+        self._pl_filtered = data.lazy().filter(predicate).collect()
+
+        self._log(f"{LOG_PREFIXES['ok']} {self._pl_filtered.height} optimisations filtrees (profit >= {min_profit} euros, DD <= {max_drawdown}%)")
+
+    def analyze_variables(self):
+        """Analyse les variables d'optimisation : un group_by polars par variable"""
+        filtered = self._polars_filtered()
+        if filtered is None or filtered.height == 0:
+            self._log(f"{LOG_PREFIXES['erreur']} Aucune donnee filtree disponible")
+            return
+
+        self._columns(filtered)
+        variable_cols = self._variable_cols
+        profit_col = self._profit_col
+
+        self._log(f"{LOG_PREFIXES['info']} Variables detectees: {variable_cols}")
+
+        if not profit_col:
+            self._log(f"{LOG_PREFIXES['erreur']} Colonne profit non trouvee pour l'analyse")
+            return
+
+        # Une requête polars par variable, indépendantes : exécutées en parallèle
+        # (polars relâche le GIL), résultats rangés dans l'ordre des variables
+        value_cols = self._value_cols()
+        workers = max(1, min(len(value_cols), os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda var_col: self._analyze_variable(filtered, var_col, profit_col),
+                                    value_cols))
+
+        for var_col, stats in zip(value_cols, results):
+            if stats is not None:
+                self.variable_stats[var_col] = stats
+
+    def _analyze_variable(self, filtered, var_col, profit_col):
+        """Statistiques d'une variable (None si vide ou en erreur) ; sans état partagé"""
+        import polars as pl
+        profit = pl.col(profit_col)
+        above = profit.filter(profit >= profit.median())
+        below = profit.filter(profit < profit.median())
+
+        try:
+            clean_data = filtered.select([var_col, profit_col]).drop_nulls()
+
+            if clean_data.height == 0:
+                return None
+
+            # Statistiques par valeur, triées par occurrences décroissantes puis par valeur
+            # (même ordre que le tri stable de la version pandas)
+            groups = (
+                clean_data.group_by(var_col)
+                .agg([
+                    pl.len().alias('n'),
+                    profit.mean().alias('mean'),
+                    profit.min().alias('min'),
+                    profit.max().alias('max'),
+                    profit.sum().alias('sum'),
+                    above.mean().alias('high_mean'),
+                    above.min().alias('high_min'),
+                    above.max().alias('high_max'),
+                    below.len().alias('low_n'),
+                    below.mean().alias('low_mean'),
+                    below.min().alias('low_min'),
+                    below.max().alias('low_max'),
+                ])
+                .sort(['n', var_col], descending=[True, False])
+            )
+
+            stats = {
+                'occurrences': groups.height,
+                'valeurs_uniques': groups.height,
+                'profit_min': groups['min'].min(),
+                'profit_max': groups['max'].max(),
+                'profit_moyen': clean_data[profit_col].mean(),
+                'top_valeurs': []
+            }
+
+            value_scores = []
+            for row in groups.head(5).iter_rows(named=True):
+                count = row['n']
+                avg_profit = row['mean']
+
+                reliability_bonus = min(count / 10, 5.0)
+                performance_score = avg_profit / 1000
+                composite_score = performance_score + reliability_bonus
+
+                if row['low_n'] > 0:
+                    rr_ratio = row['high_mean'] / row['low_mean'] if row['low_mean'] > 0 else 1.0
+                    rr_min = row['high_min'] / row['low_max'] if row['low_max'] > 0 else 1.0
+                    rr_max = row['high_max'] / row['low_min'] if row['low_min'] > 0 else 2.0
+                else:
+                    rr_ratio = row['max'] / avg_profit if avg_profit > 0 else 1.0
+                    rr_min = 1.0
+                    rr_max = rr_ratio * 1.5
+
+                value_scores.append({
+                    'valeur': row[var_col],
+                    'profit_moyen': avg_profit,
+                    'profit_min': row['min'],
+                    'profit_max': row['max'],
+                    'occurrences': count,
+                    'profit_total': row['sum'],
+                    'score_composite': composite_score,
+                    'rr_ratio': rr_ratio,
+                    'rr_min': rr_min,
+                    'rr_max': rr_max
+                })
+
+            stats['top_valeurs'] = value_scores
+            return stats
+
+        except Exception as e:
+            self._log(f"{LOG_PREFIXES['warning']} Erreur analyse variable {var_col}: {e}")
+            return None
+
+    def find_best_optimizations(self, top_n: int = 10):
+        """Trouve les meilleures optimisations (tri polars, sans iterrows)"""
+        filtered = self._polars_filtered()
+        if filtered is None:
+            self._log(f"{LOG_PREFIXES['erreur']} Aucune donnee filtree disponible")
+            return
+
+        self._columns(filtered)
+        profit_col = self._profit_col
+
+        if not profit_col:
+            self._log(f"{LOG_PREFIXES['erreur']} Colonne profit non trouvee")
+            return
+
+        import polars as pl
+
+        # Tri stable décroissant : à profit égal, même ordre que nlargest
+        best = filtered.sort(profit_col, descending=True, nulls_last=True, maintain_order=True).head(top_n)
+        other_cols = [col for col in best.columns if col != profit_col]
 
-        print(f"[OK] Donnees sauvegardees: {output_file}")
+        self.best_optimizations = best.select([pl.col(profit_col).alias('profit')] + other_cols).to_dicts()
 
 
 def main():
     """Fonction principale d'exemple d'utilisation"""
-    analyzer = MQL5OptimizationAnalyzer()
+    analyzer = MQL5OptimizationAnalyzerPolars() if POLARS_AVAILABLE else MQL5OptimizationAnalyzer()
 
     # Instructions d'utilisation
-    print("[INFO] ANALYSEUR D'OPTIMISATIONS MQL5")
+    print(f"{LOG_PREFIXES['info']} ANALYSEUR D'OPTIMISATIONS MQL5")
     print("=" * 50)
-    print("\n[INFO] UTILISATION:")
+    print(f"\n{LOG_PREFIXES['info']} UTILISATION:")
     print("1. Placez votre fichier Excel XML dans le meme dossier")
     print("2. Modifiez le nom du fichier ci-dessous")
     print("3. Executez le script")
-    print("\n[INFO] EXEMPLE:")
+    print(f"\n{LOG_PREFIXES['info']} EXEMPLE:")
 
     # Exemple d'utilisation (à adapter)
     fichier_excel = "optimizations.xlsx"  # <- CHANGEZ CE NOM
 
     if os.path.exists(fichier_excel):
-        print(f"[INFO] Chargement de {fichier_excel}...")
+        print(f"{LOG_PREFIXES['info']} Chargement de {fichier_excel}...")
 
         if analyzer.load_excel_xml(fichier_excel):
-            print("[INFO] Filtrage des optimisations profitables...")
+            print(f"{LOG_PREFIXES['info']} Filtrage des optimisations profitables...")
             analyzer.filter_profitable_optimizations(min_profit=7000, max_drawdown=7.0)
 
-            print("[INFO] Analyse des variables...")
+            print(f"{LOG_PREFIXES['info']} Analyse des variables...")
             analyzer.analyze_variables()
 
-            print("[INFO] Recherche des meilleures optimisations...")
+            print(f"{LOG_PREFIXES['info']} Recherche des meilleures optimisations...")
             analyzer.find_best_optimizations(top_n=10)
 
-            print("[INFO] Generation du rapport...")
-            analyzer.generate_report()
-            analyzer.save_json_data()
+            print(f"{LOG_PREFIXES['info']} Generation du rapport...")
+            writes = [analyzer.generate_report(), analyzer.save_json_data()]
+            wait_for_writes()
 
-            print("\n[OK] ANALYSE TERMINEE!")
-            print("[INFO] Consultez 'rapport_optimisations_mql5.txt' pour les resultats")
+            # Les échecs d'écriture sont déjà signalés par le thread d'écriture
+            if all(write.exception() is None for write in writes):
+                print(f"\n{LOG_PREFIXES['ok']} ANALYSE TERMINEE!")
+                print(f"{LOG_PREFIXES['info']} Consultez 'rapport_optimisations_mql5.txt' pour les resultats")
     else:
-        print(f"[ERREUR] Fichier '{fichier_excel}' non trouve")
-        print("[INFO] Fichiers Excel disponibles dans le dossier:")
+        print(f"{LOG_PREFIXES['erreur']} Fichier '{fichier_excel}' non trouve")
+        print(f"{LOG_PREFIXES['info']} Fichiers Excel disponibles dans le dossier:")
         excel_files = [f for f in os.listdir('.') if f.endswith(('.xlsx', '.xls', '.xml'))]
         for f in excel_files:
             print(f"   • {f}")
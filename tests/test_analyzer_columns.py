@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Détection des colonnes profit/drawdown de l'analyseur
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mql5_optimization_analyzer import MQL5OptimizationAnalyzer
+
+
+def _analyzer(columns):
+    analyzer = MQL5OptimizationAnalyzer()
+    analyzer._log = lambda *args: None
+    analyzer._detect_columns(columns)
+    return analyzer
+
+
+def test_french_headers_filter_on_profit_not_resultat():
+    # Export MT5 français : 'Résultat' (critère d'optimisation) précède 'Profit'
+    analyzer = MQL5OptimizationAnalyzer()
+    analyzer._log = lambda *args: None
+    analyzer.data = pd.DataFrame({
+        'Passe': [0, 1, 2],
+        'Résultat': [9000.0, 9500.0, 100.0],
+        'Profit': [8000.0, 100.0, 7500.0],
+        'Profit Factor': [1.8, 1.1, 1.6],
+        'Drawdown %': [3.0, 2.0, 5.0],
+        'Stop_Loss': [20, 50, 80],
+    })
+    analyzer.filter_profitable_optimizations(min_profit=7000, max_drawdown=7.0)
+
+    assert analyzer._profit_col == 'Profit'
+    assert analyzer.filtered_data['Passe'].tolist() == [0, 2]
+
+
+def test_exact_profit_wins_over_profit_factor():
+    assert _analyzer(['Pass', 'Profit Factor', 'Profit', 'Equity DD %'])._profit_col == 'Profit'
+
+
+def test_resultat_used_when_no_profit_column():
+    analyzer = _analyzer(['Passe', 'Résultat', 'Perte max %', 'Stop_Loss'])
+    assert analyzer._profit_col == 'Résultat'
+    assert analyzer._dd_col == 'Perte max %'
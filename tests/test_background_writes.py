@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Écritures en arrière-plan : une erreur est rendue au Future sans bloquer la file
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mql5_optimization_analyzer import MQL5OptimizationAnalyzer
+
+
+def test_write_errors_reach_the_future_and_later_writes_still_run(tmp_path):
+    analyzer = MQL5OptimizationAnalyzer()
+    analyzer._log = lambda *args: None
+
+    bad_path = analyzer.save_json_data('a\0b.json')
+    bad_type = analyzer.generate_report(None)
+    good = analyzer.save_json_data(str(tmp_path / 'ok.json'))
+
+    # Délais bornés : un thread d'écriture mort ferait échouer le test au lieu de le bloquer
+    assert isinstance(bad_path.exception(timeout=5), ValueError)
+    assert isinstance(bad_type.exception(timeout=5), TypeError)
+    assert good.result(timeout=5) == str(tmp_path / 'ok.json')
+    assert (tmp_path / 'ok.json').read_bytes().startswith(b'{')
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture des exports SpreadsheetML de MT5 : seule la première feuille compte
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_v2 import parse_mt5_xml
+from mql5_optimization_analyzer import _read_spreadsheet_xml
+
+
+def _worksheet(name, rows):
+    """Feuille SpreadsheetML : une ligne <Row> par liste de valeurs"""
+    body = ''.join(
+        '<Row>' + ''.join(f'<Cell><Data ss:Type="{kind}">{value}</Data></Cell>' for kind, value in row) + '</Row>'
+        for row in rows
+    )
+    return f'<Worksheet ss:Name="{name}"><Table>{body}</Table></Worksheet>'
+
+
+def _two_sheet_workbook():
+    header = [('String', 'Pass'), ('String', 'Profit'), ('String', 'Equity DD %'), ('String', 'Stop_Loss')]
+    sheet1 = _worksheet('Tester Optimizator Results', [
+        header,
+        [('Number', 0), ('Number', 8000.5), ('Number', 3.2), ('Number', 50)],
+        [('Number', 1), ('Number', 6500), ('Number', 9.1), ('Number', 20)],
+    ])
+    sheet2 = _worksheet('Notes', [
+        header,
+        [('String', 'a'), ('String', 'texte'), ('String', 'b'), ('String', 'c')],
+    ])
+    return (
+        '<?xml version="1.0"?>'
+        '<Workbook xmlns="urn:schemas-microsoft-com:office:spreadsheet" '
+        'xmlns:ss="urn:schemas-microsoft-com:office:spreadsheet">'
+        + sheet1 + sheet2 +
+        '</Workbook>'
+    ).encode('utf-8')
+
+
+def test_parse_mt5_xml_ignores_following_worksheets(tmp_path):
+    raw = _two_sheet_workbook()
+    df = parse_mt5_xml(raw)
+
+    assert df.shape == (2, 4)
+    assert list(df.columns) == ['Pass', 'Profit', 'Equity DD %', 'Stop_Loss']
+    assert df['Profit'].tolist() == [8000.5, 6500]
+
+    # Même lecture que le parseur de l'analyseur
+    path = tmp_path / 'two_sheets.xml'
+    path.write_bytes(raw)
+    ref = _read_spreadsheet_xml(str(path))
+    assert ref.shape == df.shape
+    assert ref['Profit'].astype(float).tolist() == df['Profit'].tolist()